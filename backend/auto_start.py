@@ -4,23 +4,44 @@ Otomatik Port Bulma ve Backend Başlatma Script'i
 Bu script available port bulur ve backend'i otomatik olarak başlatır.
 """
 
+import signal
 import socket
 import subprocess
 import sys
 import os
 import time
 import json
+from contextlib import closing
 from pathlib import Path
 
-def is_port_available(port):
-    """Port'un kullanılabilir olup olmadığını kontrol eder"""
+# src/utils/api.ts içindeki API_BASE_URL'in port'u
+FRONTEND_API_PORT = 8000
+
+def _ipv6_loopback_in_use(port):
+    """localhost ::1'e çözülebilir; sadece ::1'i dinleyen bir sunucu IPv4 bind'ını engellemez"""
+    if not socket.has_ipv6:
+        return False
+    try:
+        with socket.socket(socket.AF_INET6, socket.SOCK_STREAM) as s:
+            s.settimeout(0.2)
+            return s.connect_ex(('::1', port)) == 0
+    except OSError:
+        return False
+
+def is_port_available(port, host="0.0.0.0"):
+    """Port'un kullanılabilir olup olmadığını bind denemesiyle kontrol eder"""
     try:
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.settimeout(1)
-            result = s.connect_ex(('localhost', port))
-            return result != 0
-    except Exception:
+            if os.name == 'nt':
+                # Windows'ta SO_REUSEADDR dolu port'a bind'a izin verir; özel kullanım iste
+                s.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
+            else:
+                # uvicorn da SO_REUSEADDR kullanır; TIME_WAIT'teki port'ları dolu sayma
+                s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            s.bind((host, port))
+    except OSError:
         return False
+    return not _ipv6_loopback_in_use(port)
 
 def find_available_port(start_port=8000, end_port=8010):
     """Kullanılabilir port aralığında boş port bulur"""
@@ -29,6 +50,12 @@ def find_available_port(start_port=8000, end_port=8010):
             return port
     return None
 
+def find_any_free_port():
+    """Çekirdekten tek bir bind çağrısıyla herhangi bir boş port ister"""
+    with closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as s:
+        s.bind(('', 0))
+        return s.getsockname()[1]
+
 def update_port_config(port):
     """Port bilgisini config dosyasına yazar"""
     config_path = Path(__file__).parent / "port_config.json"
@@ -45,6 +72,21 @@ def update_port_config(port):
     except Exception as e:
         print(f"⚠️  Port konfigürasyonu yazılamadı: {e}")
 
+def wait_until_listening(process, port, timeout=30.0, interval=0.05):
+    """Süreç port'u dinlemeye başlayana kadar kısa aralıklarla yoklar"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and process.poll() is None:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.settimeout(0.2)
+            if s.connect_ex(('127.0.0.1', port)) == 0:
+                return True
+        time.sleep(interval)
+    return False
+
+def _raise_keyboard_interrupt(signum, frame):
+    """SIGTERM/SIGHUP'ı Ctrl+C gibi ele alır; uvicorn süreci düzgün kapatılır"""
+    raise KeyboardInterrupt
+
 def start_backend(port):
     """Backend'i belirtilen port'ta başlatır"""
     try:
@@ -53,14 +95,15 @@ def start_backend(port):
         # Update port configuration
         update_port_config(port)
         
-        # Start uvicorn server
+        # Start uvicorn server (production modunda dosya izleyen --reload kullanılmaz)
         cmd = [
             sys.executable, "-m", "uvicorn", 
             "main:app", 
-            "--reload", 
             "--host", "0.0.0.0", 
             "--port", str(port)
         ]
+        if os.getenv("MEDIRISK_PROD") != "1":
+            cmd.insert(4, "--reload")
         
         print(f"📝 Komut: {' '.join(cmd)}")
         
@@ -68,16 +111,21 @@ def start_backend(port):
         backend_dir = Path(__file__).parent
         os.chdir(backend_dir)
         
-        # Start the process
-        process = subprocess.Popen(cmd)
+        # Start the process (close_fds=False lets CPython use posix_spawn)
+        process = subprocess.Popen(cmd, close_fds=False)
+        
+        # run.py servisleri SIGTERM ile durdurur; uvicorn'u sahipsiz bırakmadan kapat
+        for sig_name in ('SIGTERM', 'SIGHUP'):
+            if hasattr(signal, sig_name):
+                signal.signal(getattr(signal, sig_name), _raise_keyboard_interrupt)
         
-        # Wait a moment to check if it started successfully
-        time.sleep(2)
+        # Port dinlemeye başlayana ya da süreç ölene kadar bekle
+        wait_until_listening(process, port)
         
         if process.poll() is None:
             print(f"✅ Backend başarıyla başlatıldı!")
             print(f"🌐 API URL: http://localhost:{port}")
-            print(f"📊 Health Check: http://localhost:{port}/")
+            print(f"📊 Health Check: http://localhost:{port}/api/health")
             print(f"📚 API Docs: http://localhost:{port}/docs")
             print(f"🛑 Durdurmak için Ctrl+C tuşlayın")
             
@@ -112,16 +160,22 @@ def main():
     available_port = find_available_port()
     
     if available_port is None:
+        # find_available_port tüm aralığı az önce yokladı - tekrar yoklamaya gerek yok
         print("❌ 8000-8010 aralığında kullanılabilir port bulunamadı!")
-        print("💡 Mevcut port'ları kontrol edin:")
-        for port in range(8000, 8011):
-            if not is_port_available(port):
-                print(f"   - Port {port}: ⚠️  Kullanımda")
-            else:
-                print(f"   - Port {port}: ✅ Kullanılabilir")
-        sys.exit(1)
+        print("💡 8000-8010 arasındaki tüm port'lar kullanımda")
+        
+        # Aralık dolu - çekirdeğin atadığı herhangi bir boş port'a düş
+        available_port = find_any_free_port()
+        print(f"⚠️  Aralık dışı port kullanılacak: {available_port}")
+    else:
+        print(f"✅ Kullanılabilir port bulundu: {available_port}")
     
-    print(f"✅ Kullanılabilir port bulundu: {available_port}")
+    # Frontend API adresi sabit (proxy yok); başka port'ta arayüz backend'e ulaşamaz
+    if available_port != FRONTEND_API_PORT:
+        print(f"⚠️  Frontend API'yi http://localhost:{FRONTEND_API_PORT} adresinde arar; "
+              f"arayüz bu backend'e bağlanamayacak.")
+        print(f"💡 Çözüm: port {FRONTEND_API_PORT}'i kullanan süreci kapatın ya da "
+              f"src/utils/api.ts içindeki API_BASE_URL'i 'http://localhost:{available_port}' yapın")
     
     # Start backend
     success = start_backend(available_port)
@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
 from fastapi import FastAPI, HTTPException, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+from fastapi.staticfiles import StaticFiles
+from starlette.exceptions import HTTPException as StarletteHTTPException
 from pydantic import BaseModel
 from typing import Dict, Any, List, Optional
 import joblib
@@ -9,18 +11,75 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import os
+import sys
 import json
 import logging
 import asyncio
 import requests
+from requests.adapters import HTTPAdapter
 import time
 from dotenv import load_dotenv
 
+# Depo kökündeki Gemini servisi (akışlı rapor geliştirme için)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+try:
+    import gemini_report_enhancer
+    from gemini_report_enhancer import GeminiReportEnhancer
+    # Modül aiohttp olmadan da import edilir; async servis için aiohttp şart
+    GEMINI_ENHANCER_AVAILABLE = gemini_report_enhancer.AIOHTTP_AVAILABLE
+except ImportError:
+    GEMINI_ENHANCER_AVAILABLE = False
+
 # Load environment variables
 load_dotenv()
 
 # Logging ayarları
 logging.basicConfig(level=logging.INFO)
+
+# Gemini çağrıları için ortak bağlantı havuzu (her istekte yeni TCP/TLS kurulumu yapılmaz).
+# Tekrar deneme enhance_report içindeki 503 döngüsünde yapıldığından adapter'da retry yok.
+http_session = requests.Session()
+http_session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20))
+
+class CircuitBreaker:
+    """Art arda başarısız/yavaş çağrılardan sonra servisi bir süreliğine devre dışı bırakır"""
+    
+    def __init__(self, fail_max: int = 5, reset_timeout: float = 60.0, slow_call_seconds: float = 10.0):
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self.slow_call_seconds = slow_call_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+    
+    def allow(self) -> bool:
+        """Çağrı yapılabilir mi? Süre dolunca tek bir deneme çağrısına izin verir (half-open)"""
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            # Deneme çağrısı sonuçlanana kadar diğer istekler fallback almaya devam eder
+            self.opened_at = time.monotonic()
+            return True
+        return False
+    
+    def record_success(self, duration: float):
+        if duration > self.slow_call_seconds:
+            self.record_failure()
+            return
+        self.failures = 0
+        self.opened_at = None
+    
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.fail_max:
+            if self.opened_at is None:
+                logger.warning(f"Gemini circuit breaker opened after {self.failures} failures")
+            self.opened_at = time.monotonic()
+
+# Gemini yavaşladığında/çöktüğünde her istek zaman aşımını beklemesin
+gemini_circuit = CircuitBreaker(
+    fail_max=int(os.getenv('GEMINI_CB_FAIL_MAX', '5')),
+    reset_timeout=float(os.getenv('GEMINI_CB_RESET_SECONDS', '60'))
+)
 logger = logging.getLogger(__name__)
 
 app = FastAPI(
@@ -38,6 +97,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Production modu (run.py --prod): derlenmiş React uygulaması bu süreçten sunulur
+FRONTEND_BUILD_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "build"))
+SERVE_FRONTEND = (os.getenv("MEDIRISK_PROD") == "1" and
+                  os.path.isfile(os.path.join(FRONTEND_BUILD_DIR, "index.html")))
+
 # Pydantic modelleri
 class HealthTestRequest(BaseModel):
     test_type: str
@@ -183,58 +247,67 @@ def preprocess_data(form_data: Dict[str, Any], model_name: str) -> pd.DataFrame:
 
 def preprocess_heart_data(df: pd.DataFrame) -> pd.DataFrame:
     """Kalp hastalığı verilerini ön işle"""
+    # Dönüştürülen kolonları topla, tek seferde yaz
+    new_cols = {}
+    
     # Sayısal değerleri dönüştür
     numeric_columns = ['age', 'bloodPressure', 'cholesterol', 'bloodSugar', 'maxHeartRate']
     for col in numeric_columns:
         if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+            new_cols[col] = pd.to_numeric(df[col], errors='coerce')
     
     # Kategorik değerleri encode et
     if 'gender' in df.columns:
-        df['gender'] = df['gender'].map({'Erkek': 1, 'Kadın': 0})
+        new_cols['gender'] = df['gender'].map({'Erkek': 1, 'Kadın': 0})
     
     if 'chestPain' in df.columns:
-        df['chestPain'] = df['chestPain'].map({'Yok': 0, 'Hafif': 1, 'Orta': 2, 'Şiddetli': 3})
+        new_cols['chestPain'] = df['chestPain'].map({'Yok': 0, 'Hafif': 1, 'Orta': 2, 'Şiddetli': 3})
     
     # Boolean değerleri dönüştür
     boolean_columns = ['exerciseAngina', 'smoking', 'diabetes', 'familyHistory']
     for col in boolean_columns:
         if col in df.columns:
-            df[col] = df[col].astype(int)
+            new_cols[col] = df[col].astype(int)
     
-    return df
+    return df.assign(**new_cols)
 
 def preprocess_fetal_data(df: pd.DataFrame) -> pd.DataFrame:
     """Fetal sağlık verilerini ön işle"""
+    # Dönüştürülen kolonları topla, tek seferde yaz
+    new_cols = {}
+    
     # Sayısal değerleri dönüştür
     numeric_columns = ['age', 'gestationalAge', 'bloodPressure', 'bloodSugar']
     for col in numeric_columns:
         if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+            new_cols[col] = pd.to_numeric(df[col], errors='coerce')
     
     # Boolean değerleri dönüştür
     boolean_columns = ['smoking', 'diabetes', 'hypertension', 'previousComplications']
     for col in boolean_columns:
         if col in df.columns:
-            df[col] = df[col].astype(int)
+            new_cols[col] = df[col].astype(int)
     
-    return df
+    return df.assign(**new_cols)
 
 def preprocess_breast_data(df: pd.DataFrame) -> pd.DataFrame:
     """Meme kanseri verilerini ön işle"""
+    # Dönüştürülen kolonları topla, tek seferde yaz
+    new_cols = {}
+    
     # Sayısal değerleri dönüştür
     numeric_columns = ['age', 'bmi', 'ageFirstPregnancy']
     for col in numeric_columns:
         if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+            new_cols[col] = pd.to_numeric(df[col], errors='coerce')
     
     # Boolean değerleri dönüştür
     boolean_columns = ['familyHistory', 'alcohol', 'smoking', 'hormoneTherapy']
     for col in boolean_columns:
         if col in df.columns:
-            df[col] = df[col].astype(int)
+            new_cols[col] = df[col].astype(int)
     
-    return df
+    return df.assign(**new_cols)
 
 def process_prediction_result(prediction, confidence: float, model_name: str, metadata: Optional[Dict] = None) -> Dict[str, Any]:
     """Tahmin sonucunu işle ve uygun yanıt oluştur"""
@@ -793,15 +866,32 @@ def process_general_result(prediction, confidence: float, prediction_label: Opti
 
 # Eski mock fonksiyonları kaldırıldı - artık gerçek modeller kullanılıyor
 
+# Akışlı rapor geliştirmede paylaşılan Gemini servisi: tek aiohttp oturumu (bağlantı havuzu)
+# ve tek eşzamanlılık semaforu; startup'ta açılır, shutdown'da kapatılır
+gemini_enhancer: Optional["GeminiReportEnhancer"] = None
+
 @app.on_event("startup")
 async def startup_event():
     """Uygulama başlatıldığında çalışır"""
+    global gemini_enhancer
     load_models()
+    if GEMINI_ENHANCER_AVAILABLE:
+        try:
+            gemini_enhancer = await GeminiReportEnhancer().__aenter__()
+        except Exception as e:
+            logger.warning(f"Gemini servisi başlatılamadı: {str(e)}")
     logger.info("API başlatıldı ve modeller yüklendi")
 
-@app.get("/")
-async def root():
-    """Ana endpoint"""
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Uygulama kapanırken paylaşılan Gemini oturumunu kapatır"""
+    global gemini_enhancer
+    if gemini_enhancer is not None:
+        await gemini_enhancer.__aexit__(None, None, None)
+        gemini_enhancer = None
+
+def _api_status() -> JSONResponse:
+    """API durum bilgisi ("/" ve "/api/health" tarafından döndürülür)"""
     data = {
         "message": "Sağlık Tarama API'sine Hoş Geldiniz",
         "version": "1.0.0",
@@ -811,6 +901,18 @@ async def root():
     }
     return JSONResponse(content=data, media_type="application/json; charset=utf-8")
 
+@app.get("/")
+async def root():
+    """Ana endpoint"""
+    if SERVE_FRONTEND:
+        return FileResponse(os.path.join(FRONTEND_BUILD_DIR, "index.html"))
+    return _api_status()
+
+@app.get("/api/health")
+async def api_health():
+    """API durum bilgisi; production modunda "/" uygulamayı sunduğundan bu yol kullanılır"""
+    return _api_status()
+
 @app.get("/health")
 async def health_check():
     """Sağlık kontrolü"""
@@ -1123,8 +1225,33 @@ async def enhance_report(request: ReportEnhanceRequest):
         retry_delay = 2  # seconds
         
         for attempt in range(max_retries):
+            # Devre açıksa (istek sırasında açılmış olsa bile) Gemini'yi bekletmeden alternatif yanıt ver
+            if not gemini_circuit.allow():
+                fallback_response = create_fallback_response(request.domain, request.user_prompt, request.patient_data, request.prediction_result, is_api_overloaded=True)
+                return ReportEnhanceResponse(
+                    status="success",
+                    enhanced_report=fallback_response,
+                    error_message="AI sistemimiz şu anda yanıt vermiyor, alternatif yanıt sağlandı",
+                    metadata={
+                        "domain": request.domain,
+                        "provider": "fallback",
+                        "enhancement_timestamp": datetime.now().isoformat(),
+                        "error_details": "Gemini circuit breaker open",
+                        "circuit_open": True,
+                        "attempts_made": attempt,
+                        "fallback_used": True
+                    }
+                )
+            
             try:
-                response = requests.post(url, headers=headers, json=payload, timeout=30)
+                call_started = time.monotonic()
+                response = http_session.post(url, headers=headers, json=payload, timeout=30)
+                
+                # Sadece sunucu tarafı hatalar (429/5xx) devreyi etkiler
+                if response.status_code == 200:
+                    gemini_circuit.record_success(time.monotonic() - call_started)
+                elif response.status_code == 429 or response.status_code >= 500:
+                    gemini_circuit.record_failure()
                 
                 if response.status_code == 200:
                     result = response.json()
@@ -1198,6 +1325,7 @@ async def enhance_report(request: ReportEnhanceRequest):
                         )
                     
             except requests.exceptions.RequestException as e:
+                gemini_circuit.record_failure()
                 if attempt < max_retries - 1:
                     logger.warning(f"Request failed (attempt {attempt + 1}): {str(e)}, retrying...")
                     time.sleep(retry_delay)
@@ -1238,6 +1366,31 @@ async def enhance_report(request: ReportEnhanceRequest):
             }
         )
 
+@app.post("/api/enhance-report/stream")
+async def enhance_report_stream(request: ReportEnhanceRequest):
+    """Gemini AI ile medikal rapor geliştirme - rapor parçaları SSE olarak akıtılır"""
+    enhancer = gemini_enhancer
+    if enhancer is None:
+        raise HTTPException(status_code=503, detail="Gemini servisi kullanılamıyor (aiohttp kurulu mu?)")
+    
+    async def event_stream():
+        try:
+            async for text in enhancer.enhance_medical_report_stream(
+                request.domain,
+                request.patient_data,
+                request.prediction_result,
+                request.user_prompt
+            ):
+                yield f"data: {json.dumps({'text': text}, ensure_ascii=False)}\n\n"
+        except Exception as e:
+            # Akış başladıktan sonra HTTP durumu değiştirilemez; fallback metni son olay olarak gönder
+            logger.error(f"Streaming report enhancement failed: {str(e)}")
+            fallback_response = create_fallback_response(request.domain, request.user_prompt, request.patient_data, request.prediction_result, is_connection_error=True)
+            yield f"event: error\ndata: {json.dumps({'text': fallback_response, 'error': str(e)}, ensure_ascii=False)}\n\n"
+        yield "data: [DONE]\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 def create_fallback_response(domain: str, user_prompt: str, patient_data: Dict[str, Any], prediction_result: Dict[str, Any], is_api_overloaded: bool = False, is_connection_error: bool = False) -> str:
     """AI sisteminin yoğun olduğu durumlarda kullanılacak fallback cevaplar."""
     
@@ -1277,4 +1430,158 @@ def create_fallback_response(domain: str, user_prompt: str, patient_data: Dict[s
 </div>
 """
     
-    return response 
\ No newline at end of file
+    return response 
+
+def create_medical_prompt(domain: str, patient_data: Dict[str, Any], 
+                         prediction_result: Dict[str, Any], user_prompt: str) -> str:
+    """Create domain-specific medical prompt for Gemini."""
+    
+    # Türkiye saatine göre bugünün tarihini al
+    from datetime import datetime
+    import locale
+    
+    # Türkçe locale ayarla (mümkünse)
+    try:
+        locale.setlocale(locale.LC_TIME, 'tr_TR.UTF-8')
+    except:
+        pass
+    
+    current_date = datetime.now().strftime("%d %B %Y")
+    
+    base_prompt = f"""
+Sen uzman bir Türk doktorsun ve PACE metodolojisini kullanarak sistematik, kanıt tabanlı medikal raporlar hazırlarsın.
+
+ÖNEMLI FORMAT TALİMATLARI:
+- Raporu HTML formatında hazırla (sadece body içeriği, full HTML document değil)
+- Başlıkları <h3> etiketi ile belirgin yap
+- Alt başlıkları <h4> etiketi ile ayır
+- Önemli bilgileri <strong> etiketiyle vurgula
+- Liste halindeki bilgileri <ul><li> etiketleriyle düzenle
+- Tarih bilgisini mutlaka "{current_date}" olarak kullan
+- Hasta bilgilerini tablolar halinde düzenle
+- DOCTYPE, html, head etiketleri kullanma, sadece body içeriği ver
+
+PACE Yaklaşımı:
+- PLAN: Analiz planı ve hipotezler
+- ANALYZE: Veri analizi ve bulgular  
+- CONSTRUCT: Sonuç yapılandırması
+- EXECUTE: Öneri ve takip planı
+
+Hasta Verisi: {json.dumps(patient_data, ensure_ascii=False, indent=2)}
+AI Tahmin Sonucu: {json.dumps(prediction_result, ensure_ascii=False, indent=2)}
+
+Kullanıcının Sorusu: "{user_prompt}"
+
+GÖREV: Yukarıdaki verileri kullanarak profesyonel, HTML formatında bir medikal rapor hazırla.
+MUTLAKA tarih kısmını "{current_date}" olarak doldur, [Tarih] şeklinde boş bırakma!
+
+ÖNEMLİ: Sadece HTML içeriği ver, ```html veya ``` etiketleri kullanma!
+Direkt HTML etiketleriyle başla (örn: <h3>...</h3>)."""
+
+    if domain == "breast_cancer":
+        domain_prompt = f"""
+Sen deneyimli bir meme hastalıkları uzmanısın. Hastanın sorusunu samimi ve bilimsel bir dille yanıtla.
+
+ÖNEMLİ TALİMATLAR:
+- Rapor başlığı, PACE metodolojisi, şablon ifadeler KULLANMA
+- Doktor-hasta konuşması gibi samimi ol
+- Bilimsel gerçekleri açık dille anlat
+- Hastanın endişelerini anlayışla karşıla
+- Konkret öneriler ver
+
+SORUYA DOĞRUDAN CEVAP VER:
+Hastanın gerçek verilerini kullanarak "{user_prompt}" sorusunu yanıtla.
+
+Hasta Bilgileri: {json.dumps(patient_data, ensure_ascii=False, indent=2)}
+Risk Değerlendirmesi: {json.dumps(prediction_result, ensure_ascii=False, indent=2)}
+
+Yanıtını şu şekilde yapılandır:
+1. Durumu açıkla (neden bu risk seviyesi?)
+2. Hangi faktörler etkili?
+3. Bu sizin için ne anlama geliyor?
+4. Ne yapmalısınız?
+
+Sıcak, anlayışlı ama bilimsel bir dille konuş. Şablon ifadeler kullanma.
+"""
+    
+    elif domain == "cardiovascular":
+        domain_prompt = """
+Sen deneyimli bir kardiyolog ve iç hastalıkları uzmanısın. Hastanın kalp sağlığı ile ilgili sorusunu samimi ve bilimsel bir dilde yanıtla.
+
+YANITLAMA PRENSİPLERİN:
+• Hasta ile birebir konuşur gibi, sıcak ve anlayışlı bir dil kullan
+• Tıbbi bilgileri herkesin anlayabileceği şekilde açıkla
+• Endişeleri gider, umut ver ama gerçekçi ol
+• Kişiye özel öneriler ver, genel tavsiyelerden kaçın
+• Risk faktörlerini korku yaratmadan, bilgilendirici şekilde açıkla
+
+ÖNEMLİ: Rapor başlığı, strukturlu bölümler, metodoloji isimlerine YER VERME. Doğal, akıcı bir tıbbi danışmanlık konuşması yap.
+
+Cevabında şunları dahil et:
+- Risk faktörlerinin kişisel duruma özel analizi
+- Kalp sağlığını koruma yöntemleri
+- Yaşam tarzı önerileri
+- Takip gereksinimleri
+- Umut verici yaklaşımlar
+
+HTML formatında, paragraflar ve listeler kullanarak düzenle.
+"""
+    
+    elif domain == "fetal_health":
+        domain_prompt = """
+Sen deneyimli bir kadın doğum uzmanı ve perinatoloji uzmanısın. Anne adayının bebek sağlığı ile ilgili sorusunu samimi ve güven verici bir dilde yanıtla.
+
+YANITLAMA PRENSİPLERİN:
+• Anne adayı ile birebir konuşur gibi, destekleyici ve anlayışlı bir dil kullan
+• Tıbbi bilgileri korku yaratmadan, açık ve anlaşılır şekilde paylaş
+• Endişeleri gider, anne-bebek bağını güçlendirecek yaklaşım kullan
+• Gebelik sürecini pozitif ama gerçekçi bir şekilde ele al
+• Her anne için özel tavsiyelerde bulun
+
+ÖNEMLİ: Rapor başlığı, strukturlu bölümler, metodoloji isimlerine YER VERME. Doğal, sıcak bir doktor-hasta konuşması yap.
+
+Cevabında şunları dahil et:
+- CTG sonuçlarının anne adayının anlayacağı şekilde açıklanması
+- Bebek sağlığı ile ilgili değerlendirmeler
+- Gebelik takibi önerileri  
+- Anne sağlığını koruma yöntemleri
+- Doğuma hazırlık tavsiyeleri
+
+HTML formatında, paragraflar ve listeler kullanarak düzenle.
+"""
+    
+    else:
+        domain_prompt = """
+<h3>🩺 GENEL MEDİKAL RAPOR GELİŞTİRME</h3>
+
+<h4>1. BULGULAR ÖZETİ</h4>
+<h4>2. KLİNİK YORUMLAMA</h4>
+<h4>3. ÖNERİLER VE TAKİP</h4>
+<h4>4. HASTA EĞİTİMİ</h4>
+
+<strong>Raporu medikal terminolojiyi açıklayarak, HTML formatında ve anlaşılır dilde hazırla.</strong>
+"""
+    
+    return base_prompt + "\n" + domain_prompt
+
+class SPAStaticFiles(StaticFiles):
+    """Bulunamayan yolları index.html'e yönlendirir (React Router istemci tarafı rotaları)"""
+    
+    async def get_response(self, path: str, scope):
+        # Bilinmeyen API yolları uygulama sayfası değil 404 döndürmeli
+        if path == "api" or path.startswith("api/"):
+            raise StarletteHTTPException(status_code=404)
+        try:
+            response = await super().get_response(path, scope)
+        except StarletteHTTPException as exc:
+            if exc.status_code != 404:
+                raise
+            return await super().get_response("index.html", scope)
+        if response.status_code == 404:
+            return await super().get_response("index.html", scope)
+        return response
+
+# Tüm API rotalarından sonra bağlanmalı; aksi halde "/" altındaki rotaları gölgeler
+if SERVE_FRONTEND:
+    app.mount("/", SPAStaticFiles(directory=FRONTEND_BUILD_DIR, html=True), name="frontend")
+    logger.info(f"Frontend build sunuluyor: {FRONTEND_BUILD_DIR}")
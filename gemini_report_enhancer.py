@@ -22,10 +22,19 @@ import os
 import json
 import logging
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator
 from dataclasses import dataclass
 from enum import Enum
 import asyncio
+import random
+import time
+import queue
+import atexit
+import logging.handlers
+import hashlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
 
 # Import handling for optional dependencies
 try:
@@ -42,6 +51,26 @@ except ImportError:
     REQUESTS_AVAILABLE = False
     requests = None
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+try:
+    from pydantic import BaseModel, ValidationError
+    PYDANTIC_AVAILABLE = True
+except ImportError:
+    PYDANTIC_AVAILABLE = False
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis = None
+
 try:
     from dotenv import load_dotenv
     load_dotenv()
@@ -49,13 +78,33 @@ try:
 except ImportError:
     DOTENV_AVAILABLE = False
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+_log_listener = None
+
+def setup_logging(level: int = logging.INFO) -> None:
+    """Configure root logging for standalone use; records are written by a background listener thread.
+    
+    Not called on import, so applications embedding this module keep their own logging setup.
+    """
+    global _log_listener
+    if _log_listener is not None:
+        return
+    
+    # Kayıtlar kuyruğa yazılır, I/O arka plandaki dinleyici thread'inde yapılır
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    logging.basicConfig(
+        level=level,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[queue_handler]
+    )
+    if queue_handler in logging.getLogger().handlers:
+        # Mesaj QueueHandler'da biçimlendirildiğinden StreamHandler'a ayrıca format verilmez
+        _log_listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler())
+        _log_listener.start()
+        atexit.register(_log_listener.stop)
+
 class MedicalDomain(Enum):
     """Desteklenen medikal alanlar"""
     BREAST_CANCER = "breast_cancer"
@@ -66,6 +115,16 @@ class LLMProvider(Enum):
     """Desteklenen LLM sağlayıcıları"""
     GEMINI = "gemini"
 
+if PYDANTIC_AVAILABLE:
+    class EnhanceRequest(BaseModel):
+        """Validated request body for SimpleGeminiMedicalAPI.enhance_report."""
+        domain: MedicalDomain
+        patient_data: Dict[str, Any] = {}
+        prediction_result: Dict[str, Any] = {}
+        user_prompt: str = "Bu sonuçları detaylı olarak açıklar mısınız?"
+        mode: Optional[str] = None
+        provider: str = LLMProvider.GEMINI.value
+
 @dataclass
 class GeminiConfig:
     """Gemini API configuration"""
@@ -73,6 +132,10 @@ class GeminiConfig:
     # Gemini API settings
     GEMINI_API_KEY: str = os.getenv('GEMINI_API_KEY', '')
     GEMINI_MODEL: str = os.getenv('GEMINI_MODEL', 'gemini-1.5-flash')
+    # Basit sorular (kısa soru + yüksek güven) için daha hızlı model; boşsa yönlendirme kapalı
+    GEMINI_MODEL_FAST: str = os.getenv('GEMINI_MODEL_FAST', '')
+    FAST_MODEL_MAX_PROMPT_CHARS: int = 200
+    FAST_MODEL_MIN_CONFIDENCE: float = 0.85
     GEMINI_ENDPOINT: str = "https://generativelanguage.googleapis.com/v1beta/models"
     
     # Generation parameters
@@ -83,36 +146,220 @@ class GeminiConfig:
     
     # Safety settings
     SAFETY_THRESHOLD: str = os.getenv('GEMINI_SAFETY_THRESHOLD', 'BLOCK_MEDIUM_AND_ABOVE')
+    
+    # Response cache settings (REDIS_URL tanımlıysa Redis, değilse süreç içi bellek)
+    CACHE_TTL_SECONDS: int = int(os.getenv('GEMINI_CACHE_TTL', '86400'))
+    CACHE_MAX_ENTRIES: int = int(os.getenv('GEMINI_CACHE_MAX_ENTRIES', '1024'))
+    
+    # Rate limit settings
+    MAX_CONCURRENCY: int = int(os.getenv('GEMINI_MAX_CONCURRENCY', '10'))
+    MAX_RETRIES: int = int(os.getenv('GEMINI_MAX_RETRIES', '4'))
+    
+    # Batch mode settings (gerçek zamanlı olmayan toplu rapor üretimi)
+    BATCH_POLL_SECONDS: int = int(os.getenv('GEMINI_BATCH_POLL_SECONDS', '30'))
+    BATCH_TIMEOUT_SECONDS: int = int(os.getenv('GEMINI_BATCH_TIMEOUT_SECONDS', '86400'))
+    
+    # Yapılandırılmış (JSON şemalı) çıktı; kısa alanlar daha az çıktı token'ı demek
+    STRUCTURED_OUTPUT: bool = os.getenv('GEMINI_STRUCTURED_OUTPUT', '0') == '1'
+    
+    # Alan bazlı çıktı token üst sınırları (GEMINI_MAX_TOKENS bunları ayrıca sınırlar);
+    # üretim süresi çıktı token sayısıyla doğrusal arttığından gereğinden uzun rapor istenmez
+    MAX_TOKENS_BREAST_CANCER: int = int(os.getenv('GEMINI_MAX_TOKENS_BREAST_CANCER', '1200'))
+    MAX_TOKENS_CARDIOVASCULAR: int = int(os.getenv('GEMINI_MAX_TOKENS_CARDIOVASCULAR', '900'))
+    MAX_TOKENS_FETAL_HEALTH: int = int(os.getenv('GEMINI_MAX_TOKENS_FETAL_HEALTH', '1100'))
 
-class GeminiReportEnhancer:
-    """Professional Gemini service for medical report enhancement."""
+def _dumps(data: Any) -> str:
+    """Compact, key-sorted JSON for prompts; orjson when available (keeps non-ASCII like ensure_ascii=False).
     
-    def __init__(self, config: Optional[GeminiConfig] = None):
-        self.config = config or GeminiConfig()
-        self.session = None
+    Sorted keys make the prompt a normalized form of the request, so it doubles
+    as the response cache key without serializing the patient data again.
+    """
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_SORT_KEYS).decode("utf-8")
+        except TypeError:
+            # orjson str olmayan anahtarları ve bilinmeyen tipleri reddeder
+            pass
+    try:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"), sort_keys=True, default=str)
+    except TypeError:
+        # Karışık tipte anahtarlar sıralanamaz; sırasız yaz
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str)
+
+def _json_body(payload: Dict[str, Any]) -> bytes:
+    """Encode an API request body; orjson writes bytes directly when available."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+# API yanıtlarını çözmek için (orjson hem str hem bytes kabul eder)
+_json_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+
+def _log_usage(result: Dict[str, Any], model: str, max_tokens: int) -> None:
+    """Log token usage so the per-domain caps can be tuned from observed lengths."""
+    usage = result.get("usageMetadata") or {}
+    if usage:
+        logger.info(
+            f"Gemini usage ({model}): prompt={usage.get('promptTokenCount')} "
+            f"cached={usage.get('cachedContentTokenCount', 0)} "
+            f"output={usage.get('candidatesTokenCount')}/{max_tokens}"
+        )
+
+# Yanıt yapısı tanınmadığında döndürülen metin (önbelleğe alınmaz)
+UNEXPECTED_RESPONSE_TEXT = "Gemini API'den beklenmeyen yanıt formatı alındı."
+
+class TruncatedReport(str):
+    """Report text cut off by maxOutputTokens (finishReason MAX_TOKENS); returned but never cached."""
+
+def _is_cacheable(report: str) -> bool:
+    """Only complete, recognized reports go into the response cache."""
+    return report != UNEXPECTED_RESPONSE_TEXT and not isinstance(report, TruncatedReport)
+
+def _report_from_response(result: Dict[str, Any], model: str, max_tokens: int) -> str:
+    """Extract the report text from a generateContent response, flagging token-limit truncation."""
+    _log_usage(result, model, max_tokens)
+    
+    # Extract text from Gemini response
+    if "candidates" in result and len(result["candidates"]) > 0:
+        candidate = result["candidates"][0]
+        if "content" in candidate and "parts" in candidate["content"]:
+            parts = candidate["content"]["parts"]
+            if len(parts) > 0 and "text" in parts[0]:
+                if candidate.get("finishReason") == "MAX_TOKENS":
+                    logger.warning(f"Gemini report truncated at maxOutputTokens={max_tokens} ({model})")
+                    return TruncatedReport(parts[0]["text"])
+                return parts[0]["text"]
+    
+    # Fallback if structure is different
+    logger.warning(f"Unexpected Gemini response structure: {result}")
+    return UNEXPECTED_RESPONSE_TEXT
+
+class ReportCache:
+    """Exact-match cache for enhanced reports, backed by Redis or an in-process TTL dict."""
+    
+    KEY_PREFIX = "medirisk:report:"
+    
+    def __init__(self, ttl_seconds: int = 86400, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._local: "OrderedDict[str, tuple]" = OrderedDict()
+        self._redis = None
         
-        # API key kontrolü
-        if not self.config.GEMINI_API_KEY:
-            logger.warning("Gemini API key not configured. Set GEMINI_API_KEY environment variable.")
+        redis_url = os.getenv('REDIS_URL')
+        if redis_url and REDIS_AVAILABLE:
+            try:
+                self._redis = redis.Redis.from_url(redis_url, socket_timeout=0.5)
+                self._redis.ping()
+            except Exception as e:
+                logger.warning(f"Redis cache unavailable, using in-memory cache: {str(e)}")
+                self._redis = None
     
-    async def __aenter__(self):
-        """Async context manager entry"""
-        if not AIOHTTP_AVAILABLE:
-            raise ImportError("aiohttp not available. Install with: pip install aiohttp")
+    def make_key(self, provider: str, domain: str, prompt: str, model: str, structured: bool = False) -> str:
+        """Build a stable cache key from the already-normalized user prompt."""
+        raw = f"{provider}\0{model}\0{domain}\0{int(structured)}\0{prompt}"
+        return self.KEY_PREFIX + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached report text, or None on miss/expiry."""
+        if self._redis is not None:
+            try:
+                value = self._redis.get(key)
+                return value.decode("utf-8") if value is not None else None
+            except Exception as e:
+                logger.warning(f"Redis cache read failed: {str(e)}")
+                return None
         
-        self.session = aiohttp.ClientSession()
-        return self
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.time():
+            del self._local[key]
+            return None
+        # LRU: son kullanılan en sona; taşmada en eski kullanılan atılır
+        self._local.move_to_end(key)
+        return value
     
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Async context manager exit"""
-        if self.session:
-            await self.session.close()
+    def set(self, key: str, value: str) -> None:
+        """Store a report text with the configured TTL."""
+        if self._redis is not None:
+            try:
+                self._redis.setex(key, self.ttl_seconds, value)
+            except Exception as e:
+                logger.warning(f"Redis cache write failed: {str(e)}")
+            return
+        
+        self._local[key] = (time.time() + self.ttl_seconds, value)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
     
-    def _create_medical_prompt(self, domain: str, patient_data: Dict[str, Any], 
-                              prediction_result: Dict[str, Any], user_prompt: str) -> str:
-        """Create domain-specific medical prompt for Gemini."""
+    # Redis istemcisi senkron; async yolda çağrılar event loop'u bloklamasın diye thread havuzunda çalışır
+    async def aget(self, key: str) -> Optional[str]:
+        """Async variant of get(); Redis I/O runs in the default executor."""
+        if self._redis is None:
+            return self.get(key)
+        return await asyncio.get_running_loop().run_in_executor(None, self.get, key)
+    
+    async def aset(self, key: str, value: str) -> None:
+        """Async variant of set(); Redis I/O runs in the default executor."""
+        if self._redis is None:
+            self.set(key, value)
+            return
+        await asyncio.get_running_loop().run_in_executor(None, self.set, key, value)
+
+_report_cache: Optional[ReportCache] = None
+
+def get_report_cache(config: Optional["GeminiConfig"] = None) -> ReportCache:
+    """Return the process-wide report cache, creating it on first use."""
+    global _report_cache
+    if _report_cache is None:
+        config = config or GeminiConfig()
+        _report_cache = ReportCache(config.CACHE_TTL_SECONDS, config.CACHE_MAX_ENTRIES)
+    return _report_cache
+
+async def aget_report_cache(config: Optional["GeminiConfig"] = None) -> ReportCache:
+    """Async get_report_cache(); the first call's Redis ping runs off the event loop."""
+    if _report_cache is not None:
+        return _report_cache
+    return await asyncio.get_running_loop().run_in_executor(None, get_report_cache, config)
+
+def _extract_text(result: Dict[str, Any]) -> Optional[str]:
+    """Return the first candidate's text from a GenerateContentResponse, if present."""
+    candidates = result.get("candidates") or []
+    if candidates:
+        parts = (candidates[0].get("content") or {}).get("parts") or []
+        if parts and "text" in parts[0]:
+            return parts[0]["text"]
+    return None
+
+_http_session = None
+
+def get_http_session():
+    """Return the process-wide requests.Session with pooled keep-alive connections."""
+    global _http_session
+    if _http_session is None:
+        from requests.adapters import HTTPAdapter
         
-        base_prompt = f"""
+        adapter = HTTPAdapter(pool_connections=20, pool_maxsize=50)
+        _http_session = requests.Session()
+        _http_session.mount("https://", adapter)
+    return _http_session
+
+# Kota aşımı (429) ve aşırı yük (503) yanıtları tekrar denenir
+RETRYABLE_STATUS_CODES = (429, 503)
+
+def _retry_delay(retry_after: Optional[str], attempt: int) -> float:
+    """Seconds to wait before retrying: Retry-After if given, else jittered exponential backoff."""
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+    return 2 ** attempt + random.random() * 0.2
+
+# Alanlardan bağımsız sabit talimat (hasta verisi içermez)
+_SYSTEM_PROMPT_BASE = """
 Sen uzman bir Türk doktorsun ve PACE metodolojisini kullanarak sistematik, kanıt tabanlı medikal raporlar hazırlarsın.
 
 PACE Yaklaşımı:
@@ -121,16 +368,12 @@ PACE Yaklaşımı:
 - CONSTRUCT: Sonuç yapılandırması
 - EXECUTE: Öneri ve takip planı
 
-Hasta Verisi: {json.dumps(patient_data, ensure_ascii=False, indent=2)}
-AI Tahmin Sonucu: {json.dumps(prediction_result, ensure_ascii=False, indent=2)}
-
-Kullanıcının Sorusu: "{user_prompt}"
-
-GÖREV: Yukarıdaki verileri kullanarak profesyonel bir medikal rapor hazırla.
+GÖREV: Kullanıcı mesajındaki hasta verisi ve AI tahmin sonucunu kullanarak profesyonel bir medikal rapor hazırla.
 """
 
-        if domain == MedicalDomain.BREAST_CANCER.value:
-            domain_prompt = """
+# Alan bazlı rapor rubrikleri; bilinmeyen alanlar için _GENERAL_DOMAIN_PROMPT
+_DOMAIN_PROMPTS = {
+    MedicalDomain.BREAST_CANCER.value: """
 MEME KANSERİ RAPOR GELİŞTİRME:
 
 1. MORFOLOJİK ANALİZ:
@@ -154,10 +397,8 @@ MEME KANSERİ RAPOR GELİŞTİRME:
    - Hedefli tedaviler
 
 Raporu Türkçe, anlaşılır ve empati dolu bir dille hazırla.
-"""
-        
-        elif domain == MedicalDomain.CARDIOVASCULAR.value:
-            domain_prompt = """
+""",
+    MedicalDomain.CARDIOVASCULAR.value: """
 KARDİYOVASKÜLER RAPOR GELİŞTİRME:
 
 1. RİSK FAKTÖRÜ ANALİZİ:
@@ -183,10 +424,8 @@ KARDİYOVASKÜLER RAPOR GELİŞTİRME:
    - Görüntüleme yöntemleri
 
 Raporu hasta eğitimi odaklı ve motivasyonel dilde hazırla.
-"""
-        
-        elif domain == MedicalDomain.FETAL_HEALTH.value:
-            domain_prompt = """
+""",
+    MedicalDomain.FETAL_HEALTH.value: """
 FETAL SAĞLIK RAPOR GELİŞTİRME:
 
 1. CTG ANALİZ SONUÇLARI:
@@ -213,10 +452,10 @@ FETAL SAĞLIK RAPOR GELİŞTİRME:
    - Yaşam tarzı önerileri
 
 Raporu anne adayını rahatlatacak ve bilgilendirecek şekilde hazırla.
-"""
-        
-        else:
-            domain_prompt = """
+""",
+}
+
+_GENERAL_DOMAIN_PROMPT = """
 GENEL MEDİKAL RAPOR GELİŞTİRME:
 
 1. BULGULAR ÖZETİ
@@ -226,10 +465,163 @@ GENEL MEDİKAL RAPOR GELİŞTİRME:
 
 Raporu medikal terminolojiyi açıklayarak ve anlaşılır dilde hazırla.
 """
+
+# GEMINI_STRUCTURED_OUTPUT=1 iken yanıt bu şemaya uyan JSON olarak istenir
+REPORT_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "clinical_interpretation": {"type": "STRING", "description": "Klinik yorum, en fazla 400 karakter"},
+        "risk_factors": {"type": "ARRAY", "items": {"type": "STRING"}, "maxItems": 6},
+        "followup_steps": {"type": "ARRAY", "items": {"type": "STRING"}, "maxItems": 6},
+        "patient_explanation": {"type": "STRING", "description": "Hastaya sade açıklama, en fazla 500 karakter"},
+        "additional_tests": {"type": "ARRAY", "items": {"type": "STRING"}, "maxItems": 5},
+    },
+    "required": ["clinical_interpretation", "risk_factors", "followup_steps",
+                 "patient_explanation", "additional_tests"],
+}
+
+_STRUCTURED_OUTPUT_NOTE = """
+ÇIKTI: Raporu yalnızca istenen JSON alanlarıyla, kısa ve öz hazırla; alan dışında metin yazma.
+"""
+
+def _parse_structured_report(text: str) -> Optional[Dict[str, Any]]:
+    """Parse a JSON-mode report; None if the model did not return valid JSON."""
+    try:
+        report = _json_loads(text)
+    except ValueError:
+        logger.warning("Structured report is not valid JSON")
+        return None
+    return report if isinstance(report, dict) else None
+
+@lru_cache(maxsize=None)
+def _system_instruction(domain: str) -> str:
+    """Assemble the system instruction once per domain."""
+    return _SYSTEM_PROMPT_BASE + "\n" + _DOMAIN_PROMPTS.get(domain, _GENERAL_DOMAIN_PROMPT)
+
+class GeminiReportEnhancer:
+    """Professional Gemini service for medical report enhancement."""
+    
+    def __init__(self, config: Optional[GeminiConfig] = None):
+        self.config = config or GeminiConfig()
+        self.session = None
+        self._semaphore = None
+        
+        # İstekten isteğe değişmeyen kısımlar bir kez hazırlanır
+        # (API anahtarı URL yerine başlıkta gönderilir)
+        self._headers = {
+            "Content-Type": "application/json",
+            "x-goog-api-key": self.config.GEMINI_API_KEY,
+        }
+        self._generation_config = {
+            "temperature": self.config.TEMPERATURE,
+            "topK": self.config.TOP_K,
+            "topP": self.config.TOP_P,
+            "maxOutputTokens": self.config.MAX_TOKENS,
+        }
+        if self.config.STRUCTURED_OUTPUT:
+            self._generation_config["responseMimeType"] = "application/json"
+            self._generation_config["responseSchema"] = REPORT_RESPONSE_SCHEMA
+        self._safety_settings = [
+            {"category": category, "threshold": self.config.SAFETY_THRESHOLD}
+            for category in (
+                "HARM_CATEGORY_HARASSMENT",
+                "HARM_CATEGORY_HATE_SPEECH",
+                "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+                "HARM_CATEGORY_DANGEROUS_CONTENT",
+            )
+        ]
+        
+        # API key kontrolü
+        if not self.config.GEMINI_API_KEY:
+            logger.warning("Gemini API key not configured. Set GEMINI_API_KEY environment variable.")
+    
+    async def __aenter__(self):
+        """Async context manager entry"""
+        if not AIOHTTP_AVAILABLE:
+            raise ImportError("aiohttp not available. Install with: pip install aiohttp")
+        
+        # Eşzamanlı istekler aynı bağlantı havuzunu paylaşır
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=100, limit_per_host=20),
+            timeout=aiohttp.ClientTimeout(total=30)
+        )
+        # Aynı anda API'ye giden istek sayısını sınırla (çalışan event loop içinde oluşturulmalı)
+        self._semaphore = asyncio.Semaphore(self.config.MAX_CONCURRENCY)
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit"""
+        if self.session:
+            await self.session.close()
+    
+    def _create_system_instruction(self, domain: str) -> str:
+        """Create the static, domain-specific system instruction for Gemini.
+        
+        Contains no patient data, so the prefix is identical across requests
+        of the same domain and can be reused by Gemini's implicit prompt caching.
+        """
+        if self.config.STRUCTURED_OUTPUT:
+            return _system_instruction(domain) + _STRUCTURED_OUTPUT_NOTE
+        return _system_instruction(domain)
+
+    def _create_medical_prompt(self, domain: str, patient_data: Dict[str, Any], 
+                              prediction_result: Dict[str, Any], user_prompt: str) -> str:
+        """Create the per-request user message (patient data and question only)."""
+        
+        return f"""
+Hasta Verisi: {_dumps(patient_data)}
+AI Tahmin Sonucu: {_dumps(prediction_result)}
+
+Kullanıcının Sorusu: "{user_prompt}"
+"""
+
+    def _select_model(self, domain: str, prediction_result: Dict[str, Any], user_prompt: str) -> str:
+        """Pick the fast model for short, high-confidence, non-oncology requests (opt-in via GEMINI_MODEL_FAST)."""
+        if not self.config.GEMINI_MODEL_FAST:
+            return self.config.GEMINI_MODEL
+        
+        try:
+            confidence = float(prediction_result.get("confidence", 0))
+        except (TypeError, ValueError):
+            confidence = 0.0
+        
+        if (len(user_prompt) < self.config.FAST_MODEL_MAX_PROMPT_CHARS
+                and confidence > self.config.FAST_MODEL_MIN_CONFIDENCE
+                and domain != MedicalDomain.BREAST_CANCER.value):
+            return self.config.GEMINI_MODEL_FAST
+        return self.config.GEMINI_MODEL
+
+    def _max_tokens_for(self, domain: str) -> int:
+        """Output token cap for a domain, never above the configured MAX_TOKENS."""
+        caps = {
+            MedicalDomain.BREAST_CANCER.value: self.config.MAX_TOKENS_BREAST_CANCER,
+            MedicalDomain.CARDIOVASCULAR.value: self.config.MAX_TOKENS_CARDIOVASCULAR,
+            MedicalDomain.FETAL_HEALTH.value: self.config.MAX_TOKENS_FETAL_HEALTH,
+        }
+        return min(caps.get(domain, self.config.MAX_TOKENS), self.config.MAX_TOKENS)
+
+    def _build_payload(self, prompt: str, system_instruction: Optional[str] = None,
+                       max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """Build the generateContent request body for a prompt."""
+        # Gemini API request format
+        generation_config = self._generation_config
+        if max_tokens and max_tokens != generation_config["maxOutputTokens"]:
+            generation_config = dict(generation_config, maxOutputTokens=max_tokens)
+        
+        payload = {
+            "contents": [{"parts": [{"text": prompt}]}],
+            "generationConfig": generation_config,
+            "safetySettings": self._safety_settings,
+        }
+        
+        # Sabit talimat ayrı gönderilir; değişen hasta verisi yalnızca contents içinde
+        if system_instruction:
+            payload["systemInstruction"] = {"parts": [{"text": system_instruction}]}
         
-        return base_prompt + "\n" + domain_prompt
+        return payload
 
-    async def _call_gemini_api(self, prompt: str) -> str:
+    async def _call_gemini_api(self, prompt: str, system_instruction: Optional[str] = None,
+                               model: Optional[str] = None, max_tokens: Optional[int] = None) -> str:
         """Call Gemini API for report enhancement."""
         if not self.config.GEMINI_API_KEY:
             raise ValueError("Gemini API key not configured. Set GEMINI_API_KEY environment variable.")
@@ -237,83 +629,91 @@ Raporu medikal terminolojiyi açıklayarak ve anlaşılır dilde hazırla.
         if not self.session:
             raise RuntimeError("Session not initialized. Use async context manager.")
             
-        url = f"{self.config.GEMINI_ENDPOINT}/{self.config.GEMINI_MODEL}:generateContent"
+        url = f"{self.config.GEMINI_ENDPOINT}/{model or self.config.GEMINI_MODEL}:generateContent"
+        payload = self._build_payload(prompt, system_instruction, max_tokens)
         
-        headers = {
-            "Content-Type": "application/json",
-        }
+        try:
+            for attempt in range(self.config.MAX_RETRIES + 1):
+                async with self._semaphore:
+                    async with self.session.post(url, headers=self._headers, data=_json_body(payload)) as response:
+                        if response.status == 200:
+                            result = await response.json(loads=_json_loads)
+                            return _report_from_response(result, model or self.config.GEMINI_MODEL,
+                                                         payload["generationConfig"]["maxOutputTokens"])
+                        
+                        error_text = await response.text()
+                        if response.status not in RETRYABLE_STATUS_CODES or attempt == self.config.MAX_RETRIES:
+                            logger.error(f"Gemini API error: {response.status} - {error_text}")
+                            raise Exception(f"Gemini API error: {response.status} - {error_text}")
+                        
+                        delay = _retry_delay(response.headers.get("Retry-After"), attempt)
+                
+                # Beklerken semaforu tutma; diğer istekler devam edebilsin
+                logger.warning(f"Gemini API rate limited ({response.status}, attempt {attempt + 1}), retrying in {delay:.1f}s...")
+                await asyncio.sleep(delay)
+                    
+        except Exception as e:
+            logger.error(f"Gemini API call failed: {str(e)}")
+            raise
+
+    async def _stream_gemini_api(self, prompt: str, system_instruction: Optional[str] = None,
+                                 model: Optional[str] = None, max_tokens: Optional[int] = None) -> AsyncIterator[str]:
+        """Call Gemini streamGenerateContent and yield text chunks as they arrive."""
+        if not self.config.GEMINI_API_KEY:
+            raise ValueError("Gemini API key not configured. Set GEMINI_API_KEY environment variable.")
+            
+        if not self.session:
+            raise RuntimeError("Session not initialized. Use async context manager.")
         
-        # Gemini API request format
-        payload = {
-            "contents": [
-                {
-                    "parts": [
-                        {
-                            "text": prompt
-                        }
-                    ]
-                }
-            ],
-            "generationConfig": {
-                "temperature": self.config.TEMPERATURE,
-                "topK": self.config.TOP_K,
-                "topP": self.config.TOP_P,
-                "maxOutputTokens": self.config.MAX_TOKENS,
-            },
-            "safetySettings": [
-                {
-                    "category": "HARM_CATEGORY_HARASSMENT",
-                    "threshold": self.config.SAFETY_THRESHOLD
-                },
-                {
-                    "category": "HARM_CATEGORY_HATE_SPEECH", 
-                    "threshold": self.config.SAFETY_THRESHOLD
-                },
-                {
-                    "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                    "threshold": self.config.SAFETY_THRESHOLD
-                },
-                {
-                    "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
-                    "threshold": self.config.SAFETY_THRESHOLD
-                }
-            ]
-        }
+        # alt=sse: her parça "data: {...}" satırı olarak gelir
+        url = f"{self.config.GEMINI_ENDPOINT}/{model or self.config.GEMINI_MODEL}:streamGenerateContent?alt=sse"
         
-        # Add API key to URL
-        url = f"{url}?key={self.config.GEMINI_API_KEY}"
+        # Uzun raporlarda toplam süre değil, parçalar arası bekleme sınırlanır
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=30)
         
-        try:
-            async with self.session.post(url, headers=headers, json=payload) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    
-                    # Extract text from Gemini response
-                    if "candidates" in result and len(result["candidates"]) > 0:
-                        candidate = result["candidates"][0]
-                        if "content" in candidate and "parts" in candidate["content"]:
-                            parts = candidate["content"]["parts"]
-                            if len(parts) > 0 and "text" in parts[0]:
-                                return parts[0]["text"]
-                    
-                    # Fallback if structure is different
-                    logger.warning(f"Unexpected Gemini response structure: {result}")
-                    return "Gemini API'den beklenmeyen yanıt formatı alındı."
-                    
-                else:
+        async with self._semaphore:
+            async with self.session.post(url, headers=self._headers, data=_json_body(self._build_payload(prompt, system_instruction, max_tokens)),
+                                         timeout=timeout) as response:
+                if response.status != 200:
                     error_text = await response.text()
                     logger.error(f"Gemini API error: {response.status} - {error_text}")
                     raise Exception(f"Gemini API error: {response.status} - {error_text}")
+                
+                async for raw_line in response.content:
+                    line = raw_line.decode("utf-8").strip()
+                    if not line.startswith("data:"):
+                        continue
                     
-        except Exception as e:
-            logger.error(f"Gemini API call failed: {str(e)}")
-            raise
+                    chunk = _json_loads(line[len("data:"):])
+                    candidates = chunk.get("candidates") or []
+                    if candidates:
+                        for part in candidates[0].get("content", {}).get("parts", []):
+                            if part.get("text"):
+                                yield part["text"]
+
+    async def enhance_medical_report_stream(self, domain: str, patient_data: Dict[str, Any],
+                                            prediction_result: Dict[str, Any], user_prompt: str,
+                                            provider: str = LLMProvider.GEMINI.value) -> AsyncIterator[str]:
+        """Enhance medical report using the given LLM provider, yielding the report text incrementally."""
+        
+        valid_domains = [d.value for d in MedicalDomain]
+        if domain not in valid_domains:
+            raise ValueError(f"Invalid domain: {domain}. Valid domains: {valid_domains}")
+        
+        adapter = get_provider(provider)
+        system_instruction = self._create_system_instruction(domain)
+        prompt = self._create_medical_prompt(domain, patient_data, prediction_result, user_prompt)
+        model = self._select_model(domain, prediction_result, user_prompt)
+        
+        async for text in adapter.stream(self, prompt, system_instruction, model, self._max_tokens_for(domain)):
+            yield text
 
     async def enhance_medical_report(self, domain: str, patient_data: Dict[str, Any], 
-                                   prediction_result: Dict[str, Any], user_prompt: str) -> Dict[str, Any]:
-        """Enhance medical report using Gemini API."""
+                                   prediction_result: Dict[str, Any], user_prompt: str,
+                                   provider: str = LLMProvider.GEMINI.value) -> Dict[str, Any]:
+        """Enhance medical report using the given LLM provider (Gemini by default)."""
         
-        start_time = datetime.now()
+        start_time = time.perf_counter()
         
         try:
             # Validate domain
@@ -321,30 +721,48 @@ Raporu medikal terminolojiyi açıklayarak ve anlaşılır dilde hazırla.
             if domain not in valid_domains:
                 raise ValueError(f"Invalid domain: {domain}. Valid domains: {valid_domains}")
             
+            adapter = get_provider(provider)
+            
             # Create medical prompt
+            system_instruction = self._create_system_instruction(domain)
             prompt = self._create_medical_prompt(domain, patient_data, prediction_result, user_prompt)
+            model = self._select_model(domain, prediction_result, user_prompt)
+            max_tokens = self._max_tokens_for(domain)
             
-            # Call Gemini API
-            enhanced_report = await self._call_gemini_api(prompt)
+            # Aynı istek daha önce yanıtlandıysa API'ye gitme
+            cache = await aget_report_cache(self.config)
+            cache_key = cache.make_key(provider, domain, prompt, model, self.config.STRUCTURED_OUTPUT)
+            enhanced_report = await cache.aget(cache_key)
+            cache_hit = enhanced_report is not None
+            
+            if not cache_hit:
+                # Call LLM provider
+                enhanced_report = await adapter.call(self, prompt, system_instruction, model, max_tokens)
+                if _is_cacheable(enhanced_report):
+                    await cache.aset(cache_key, enhanced_report)
             
             # Calculate processing time
-            processing_time = (datetime.now() - start_time).total_seconds()
+            processing_time = time.perf_counter() - start_time
+            now_iso = datetime.now().isoformat()
             
             return {
                 "status": "success",
                 "enhanced_report": enhanced_report,
+                "structured_report": _parse_structured_report(enhanced_report) if self.config.STRUCTURED_OUTPUT else None,
                 "metadata": {
                     "domain": domain,
-                    "provider": "gemini",
-                    "model": self.config.GEMINI_MODEL,
-                    "enhancement_timestamp": datetime.now().isoformat(),
+                    "provider": provider,
+                    "model": model,
+                    "enhancement_timestamp": now_iso,
                     "user_prompt": user_prompt,
                     "original_prediction": prediction_result,
                     "processing_time_seconds": processing_time,
+                    "cache_hit": cache_hit,
+                    "truncated": isinstance(enhanced_report, TruncatedReport),
                     "processing_info": {
-                        "model_used": self.config.GEMINI_MODEL,
+                        "model_used": model,
                         "temperature": self.config.TEMPERATURE,
-                        "max_tokens": self.config.MAX_TOKENS,
+                        "max_tokens": max_tokens,
                         "top_p": self.config.TOP_P,
                         "top_k": self.config.TOP_K
                     }
@@ -354,6 +772,8 @@ Raporu medikal terminolojiyi açıklayarak ve anlaşılır dilde hazırla.
         except Exception as e:
             error_message = str(e)
             logger.error(f"Report enhancement failed: {error_message}")
+            processing_time = time.perf_counter() - start_time
+            now_iso = datetime.now().isoformat()
             
             return {
                 "status": "error",
@@ -361,13 +781,234 @@ Raporu medikal terminolojiyi açıklayarak ve anlaşılır dilde hazırla.
                 "enhanced_report": f"Rapor geliştirme sırasında bir hata oluştu: {error_message}\n\nLütfen tekrar deneyiniz veya sistem yöneticisi ile iletişime geçiniz.",
                 "metadata": {
                     "domain": domain,
-                    "provider": "gemini",
-                    "enhancement_timestamp": datetime.now().isoformat(),
+                    "provider": provider,
+                    "enhancement_timestamp": now_iso,
                     "error_details": error_message,
-                    "processing_time_seconds": (datetime.now() - start_time).total_seconds()
+                    "processing_time_seconds": processing_time
                 }
             }
 
+    async def enhance_medical_reports(self, requests_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Enhance several medical reports concurrently, results in request order.
+        
+        Realtime only: batch jobs can take hours, so requests with mode == "batch"
+        must go through enhance_medical_reports_batch instead.
+        """
+        
+        batch_indices = [i for i, request_data in enumerate(requests_data) if request_data.get("mode") == "batch"]
+        if batch_indices:
+            raise ValueError(f"Requests {batch_indices} have mode='batch'; submit them with enhance_medical_reports_batch")
+        
+        # enhance_medical_report hataları kendi içinde yakaladığından gather hiç patlamaz
+        return await asyncio.gather(*[
+            self.enhance_medical_report(
+                request_data.get("domain", ""),
+                request_data.get("patient_data", {}),
+                request_data.get("prediction_result", {}),
+                request_data.get("user_prompt", "Bu sonuçları detaylı olarak açıklar mısınız?"),
+                request_data.get("provider", LLMProvider.GEMINI.value)
+            )
+            for request_data in requests_data
+        ])
+
+    async def _run_gemini_batch(self, model: str, payloads: List[Dict[str, Any]]) -> List[Optional[str]]:
+        """Submit inline requests to Gemini batch mode and wait for the results, in input order."""
+        if not self.config.GEMINI_API_KEY:
+            raise ValueError("Gemini API key not configured. Set GEMINI_API_KEY environment variable.")
+            
+        if not self.session:
+            raise RuntimeError("Session not initialized. Use async context manager.")
+        
+        body = {
+            "batch": {
+                "display_name": f"medirisk-reports-{datetime.now().strftime('%Y%m%d%H%M%S')}",
+                "input_config": {
+                    "requests": {
+                        "requests": [
+                            {"request": payload, "metadata": {"key": f"ctx-{i}"}}
+                            for i, payload in enumerate(payloads)
+                        ]
+                    }
+                }
+            }
+        }
+        
+        url = f"{self.config.GEMINI_ENDPOINT}/{model}:batchGenerateContent"
+        async with self.session.post(url, headers=self._headers, data=_json_body(body)) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                logger.error(f"Gemini batch API error: {response.status} - {error_text}")
+                raise Exception(f"Gemini batch API error: {response.status} - {error_text}")
+            operation = await response.json(loads=_json_loads)
+        
+        # İş bitene kadar işlem durumunu yokla (batches/... kaynağı models/ ile aynı kökte)
+        api_root = self.config.GEMINI_ENDPOINT.rsplit("/models", 1)[0]
+        status_url = f"{api_root}/{operation['name']}"
+        deadline = asyncio.get_running_loop().time() + self.config.BATCH_TIMEOUT_SECONDS
+        
+        while not operation.get("done"):
+            if asyncio.get_running_loop().time() > deadline:
+                raise TimeoutError(f"Gemini batch {operation['name']} did not finish in time")
+            await asyncio.sleep(self.config.BATCH_POLL_SECONDS)
+            async with self.session.get(status_url, headers=self._headers) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise Exception(f"Gemini batch status error: {response.status} - {error_text}")
+                operation = await response.json(loads=_json_loads)
+        
+        if "error" in operation:
+            raise Exception(f"Gemini batch failed: {operation['error']}")
+        
+        # Yanıtlar response.inlinedResponses.inlinedResponses altında; sürüme göre tek seviye de olabilir
+        inlined = (operation.get("response") or {}).get("inlinedResponses") or []
+        if isinstance(inlined, dict):
+            inlined = inlined.get("inlinedResponses") or []
+        
+        texts = {}
+        for index, item in enumerate(inlined):
+            key = (item.get("metadata") or {}).get("key", f"ctx-{index}")
+            texts[key] = _extract_text(item.get("response") or {})
+        
+        return [texts.get(f"ctx-{i}") for i in range(len(payloads))]
+
+    async def enhance_medical_reports_batch(self, requests_data: List[Dict[str, Any]],
+                                            provider: str = LLMProvider.GEMINI.value) -> List[Dict[str, Any]]:
+        """Enhance medical reports through the provider's batch mode (minutes to hours, lower cost)."""
+        if not requests_data:
+            return []
+        
+        start_time = time.perf_counter()
+        # Gecikme önemli olmadığından tüm toplu işler güçlü modelle çalışır
+        model = self.config.GEMINI_MODEL
+        
+        try:
+            adapter = get_provider(provider)
+            valid_domains = [d.value for d in MedicalDomain]
+            items = []
+            for request_data in requests_data:
+                domain = request_data.get("domain", "")
+                if domain not in valid_domains:
+                    raise ValueError(f"Invalid domain: {domain}. Valid domains: {valid_domains}")
+                prompt = self._create_medical_prompt(
+                    domain,
+                    request_data.get("patient_data", {}),
+                    request_data.get("prediction_result", {}),
+                    request_data.get("user_prompt", "Bu sonuçları detaylı olarak açıklar mısınız?")
+                )
+                items.append((prompt, self._create_system_instruction(domain), self._max_tokens_for(domain)))
+            
+            texts = await adapter.run_batch(self, model, items)
+            error_message = None
+        except Exception as e:
+            texts = [None] * len(requests_data)
+            error_message = str(e)
+            logger.error(f"Batch report enhancement failed: {error_message}")
+        
+        processing_time = time.perf_counter() - start_time
+        now_iso = datetime.now().isoformat()
+        results = []
+        for request_data, text in zip(requests_data, texts):
+            if text is None:
+                message = error_message or "Gemini batch yanıtı bu istek için sonuç içermiyor"
+                results.append({
+                    "status": "error",
+                    "error_message": message,
+                    "enhanced_report": f"Rapor geliştirme sırasında bir hata oluştu: {message}\n\nLütfen tekrar deneyiniz veya sistem yöneticisi ile iletişime geçiniz.",
+                    "metadata": {
+                        "domain": request_data.get("domain", "unknown"),
+                        "provider": provider,
+                        "mode": "batch",
+                        "enhancement_timestamp": now_iso,
+                        "error_details": message,
+                        "processing_time_seconds": processing_time
+                    }
+                })
+                continue
+            
+            results.append({
+                "status": "success",
+                "enhanced_report": text,
+                "structured_report": _parse_structured_report(text) if self.config.STRUCTURED_OUTPUT else None,
+                "metadata": {
+                    "domain": request_data.get("domain"),
+                    "provider": provider,
+                    "model": model,
+                    "mode": "batch",
+                    "enhancement_timestamp": now_iso,
+                    "user_prompt": request_data.get("user_prompt"),
+                    "original_prediction": request_data.get("prediction_result", {}),
+                    "processing_time_seconds": processing_time,
+                    "processing_info": {
+                        "model_used": model,
+                        "temperature": self.config.TEMPERATURE,
+                        "max_tokens": self._max_tokens_for(request_data.get("domain", "")),
+                        "top_p": self.config.TOP_P,
+                        "top_k": self.config.TOP_K
+                    }
+                }
+            })
+        return results
+
+class ProviderAdapter(ABC):
+    """Single dispatch point for one LLM provider; registered in PROVIDERS by name.
+    
+    Every enhancement path (async, streaming, batch and the synchronous API)
+    reaches the provider only through these methods.
+    """
+    
+    @abstractmethod
+    async def call(self, enhancer: GeminiReportEnhancer, prompt: str, system_instruction: Optional[str],
+                   model: Optional[str], max_tokens: Optional[int]) -> str:
+        """Generate one report through the enhancer's async session."""
+    
+    @abstractmethod
+    def stream(self, enhancer: GeminiReportEnhancer, prompt: str, system_instruction: Optional[str],
+               model: Optional[str], max_tokens: Optional[int]) -> AsyncIterator[str]:
+        """Yield report text chunks as the provider produces them."""
+    
+    @abstractmethod
+    async def run_batch(self, enhancer: GeminiReportEnhancer, model: str,
+                        items: List[tuple]) -> List[Optional[str]]:
+        """Run (prompt, system_instruction, max_tokens) items as one batch job, results in input order."""
+    
+    @abstractmethod
+    def call_sync(self, api: "SimpleGeminiMedicalAPI", prompt: str, system_instruction: Optional[str],
+                  model: Optional[str], max_tokens: Optional[int]) -> str:
+        """Generate one report from synchronous code."""
+
+class GeminiAdapter(ProviderAdapter):
+    """Gemini generateContent / streamGenerateContent / batchGenerateContent."""
+    
+    async def call(self, enhancer: GeminiReportEnhancer, prompt: str, system_instruction: Optional[str],
+                   model: Optional[str], max_tokens: Optional[int]) -> str:
+        return await enhancer._call_gemini_api(prompt, system_instruction, model, max_tokens)
+    
+    def stream(self, enhancer: GeminiReportEnhancer, prompt: str, system_instruction: Optional[str],
+               model: Optional[str], max_tokens: Optional[int]) -> AsyncIterator[str]:
+        return enhancer._stream_gemini_api(prompt, system_instruction, model, max_tokens)
+    
+    async def run_batch(self, enhancer: GeminiReportEnhancer, model: str,
+                        items: List[tuple]) -> List[Optional[str]]:
+        payloads = [enhancer._build_payload(prompt, system_instruction, max_tokens)
+                    for prompt, system_instruction, max_tokens in items]
+        return await enhancer._run_gemini_batch(model, payloads)
+    
+    def call_sync(self, api: "SimpleGeminiMedicalAPI", prompt: str, system_instruction: Optional[str],
+                  model: Optional[str], max_tokens: Optional[int]) -> str:
+        return api._call_gemini_api_sync(prompt, system_instruction, model, max_tokens)
+
+# Yeni sağlayıcı eklemek: LLMProvider'a değer + buraya adapter (if/elif zinciri yok)
+PROVIDERS: Dict[str, ProviderAdapter] = {
+    LLMProvider.GEMINI.value: GeminiAdapter(),
+}
+
+def get_provider(provider: str) -> ProviderAdapter:
+    """Return the registered adapter for a provider name."""
+    adapter = PROVIDERS.get(provider)
+    if adapter is None:
+        raise ValueError(f"Invalid provider: {provider}. Valid providers: {list(PROVIDERS)}")
+    return adapter
+
 class SimpleGeminiMedicalAPI:
     """Simple synchronous Gemini API for medical report enhancement."""
     
@@ -376,72 +1017,26 @@ class SimpleGeminiMedicalAPI:
         
         if not REQUESTS_AVAILABLE:
             raise ImportError("requests not available. Install with: pip install requests")
+        
+        # Prompt ve istek gövdesi oluşturma async sınıfla paylaşılır
+        self._enhancer = GeminiReportEnhancer(self.config)
     
-    def _call_gemini_api_sync(self, prompt: str) -> str:
+    def _call_gemini_api_sync(self, prompt: str, system_instruction: Optional[str] = None,
+                              model: Optional[str] = None, max_tokens: Optional[int] = None) -> str:
         """Call Gemini API synchronously."""
         if not self.config.GEMINI_API_KEY:
             raise ValueError("Gemini API key not configured. Set GEMINI_API_KEY environment variable.")
         
-        url = f"{self.config.GEMINI_ENDPOINT}/{self.config.GEMINI_MODEL}:generateContent"
-        url = f"{url}?key={self.config.GEMINI_API_KEY}"
-        
-        headers = {
-            "Content-Type": "application/json",
-        }
-        
-        payload = {
-            "contents": [
-                {
-                    "parts": [
-                        {
-                            "text": prompt
-                        }
-                    ]
-                }
-            ],
-            "generationConfig": {
-                "temperature": self.config.TEMPERATURE,
-                "topK": self.config.TOP_K,
-                "topP": self.config.TOP_P,
-                "maxOutputTokens": self.config.MAX_TOKENS,
-            },
-            "safetySettings": [
-                {
-                    "category": "HARM_CATEGORY_HARASSMENT",
-                    "threshold": self.config.SAFETY_THRESHOLD
-                },
-                {
-                    "category": "HARM_CATEGORY_HATE_SPEECH", 
-                    "threshold": self.config.SAFETY_THRESHOLD
-                },
-                {
-                    "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                    "threshold": self.config.SAFETY_THRESHOLD
-                },
-                {
-                    "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
-                    "threshold": self.config.SAFETY_THRESHOLD
-                }
-            ]
-        }
+        url = f"{self.config.GEMINI_ENDPOINT}/{model or self.config.GEMINI_MODEL}:generateContent"
+        payload = self._enhancer._build_payload(prompt, system_instruction, max_tokens)
         
         try:
-            response = requests.post(url, headers=headers, json=payload, timeout=30)
+            response = get_http_session().post(url, headers=self._enhancer._headers, data=_json_body(payload), timeout=30)
             
             if response.status_code == 200:
-                result = response.json()
-                
-                # Extract text from Gemini response
-                if "candidates" in result and len(result["candidates"]) > 0:
-                    candidate = result["candidates"][0]
-                    if "content" in candidate and "parts" in candidate["content"]:
-                        parts = candidate["content"]["parts"]
-                        if len(parts) > 0 and "text" in parts[0]:
-                            return parts[0]["text"]
-                
-                # Fallback if structure is different
-                logger.warning(f"Unexpected Gemini response structure: {result}")
-                return "Gemini API'den beklenmeyen yanıt formatı alındı."
+                result = _json_loads(response.content)
+                return _report_from_response(result, model or self.config.GEMINI_MODEL,
+                                             payload["generationConfig"]["maxOutputTokens"])
                 
             else:
                 error_text = response.text
@@ -455,45 +1050,77 @@ class SimpleGeminiMedicalAPI:
     def enhance_report(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
         """Enhance medical report synchronously."""
         
-        start_time = datetime.now()
+        start_time = time.perf_counter()
         
         try:
-            # Extract data
-            domain = request_data.get("domain", "")
-            patient_data = request_data.get("patient_data", {})
-            prediction_result = request_data.get("prediction_result", {})
-            user_prompt = request_data.get("user_prompt", "Bu sonuçları detaylı olarak açıklar mısınız?")
-            
-            # Validate domain
-            valid_domains = [d.value for d in MedicalDomain]
-            if domain not in valid_domains:
-                raise ValueError(f"Invalid domain: {domain}. Valid domains: {valid_domains}")
+            if PYDANTIC_AVAILABLE:
+                # Alan tipleri ve domain tek adımda doğrulanır
+                try:
+                    request = EnhanceRequest.model_validate(request_data)
+                except ValidationError as e:
+                    details = "; ".join(
+                        f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}" for error in e.errors()
+                    )
+                    raise ValueError(f"Invalid request: {details}")
+                domain = request.domain.value
+                patient_data = request.patient_data
+                prediction_result = request.prediction_result
+                user_prompt = request.user_prompt
+                provider = request.provider
+            else:
+                # Extract data
+                domain = request_data.get("domain", "")
+                patient_data = request_data.get("patient_data", {})
+                prediction_result = request_data.get("prediction_result", {})
+                user_prompt = request_data.get("user_prompt", "Bu sonuçları detaylı olarak açıklar mısınız?")
+                provider = request_data.get("provider", LLMProvider.GEMINI.value)
+                
+                # Validate domain
+                valid_domains = [d.value for d in MedicalDomain]
+                if domain not in valid_domains:
+                    raise ValueError(f"Invalid domain: {domain}. Valid domains: {valid_domains}")
             
-            # Create enhancer instance to use prompt creation method
-            enhancer = GeminiReportEnhancer(self.config)
+            adapter = get_provider(provider)
+            enhancer = self._enhancer
+            system_instruction = enhancer._create_system_instruction(domain)
             prompt = enhancer._create_medical_prompt(domain, patient_data, prediction_result, user_prompt)
+            model = enhancer._select_model(domain, prediction_result, user_prompt)
+            max_tokens = enhancer._max_tokens_for(domain)
             
-            # Call Gemini API
-            enhanced_report = self._call_gemini_api_sync(prompt)
+            # Aynı istek daha önce yanıtlandıysa API'ye gitme
+            cache = get_report_cache(self.config)
+            cache_key = cache.make_key(provider, domain, prompt, model, self.config.STRUCTURED_OUTPUT)
+            enhanced_report = cache.get(cache_key)
+            cache_hit = enhanced_report is not None
+            
+            if not cache_hit:
+                # Call LLM provider
+                enhanced_report = adapter.call_sync(self, prompt, system_instruction, model, max_tokens)
+                if _is_cacheable(enhanced_report):
+                    cache.set(cache_key, enhanced_report)
             
             # Calculate processing time
-            processing_time = (datetime.now() - start_time).total_seconds()
+            processing_time = time.perf_counter() - start_time
+            now_iso = datetime.now().isoformat()
             
             return {
                 "status": "success",
                 "enhanced_report": enhanced_report,
+                "structured_report": _parse_structured_report(enhanced_report) if self.config.STRUCTURED_OUTPUT else None,
                 "metadata": {
                     "domain": domain,
-                    "provider": "gemini",
-                    "model": self.config.GEMINI_MODEL,
-                    "enhancement_timestamp": datetime.now().isoformat(),
+                    "provider": provider,
+                    "model": model,
+                    "enhancement_timestamp": now_iso,
                     "user_prompt": user_prompt,
                     "original_prediction": prediction_result,
                     "processing_time_seconds": processing_time,
+                    "cache_hit": cache_hit,
+                    "truncated": isinstance(enhanced_report, TruncatedReport),
                     "processing_info": {
-                        "model_used": self.config.GEMINI_MODEL,
+                        "model_used": model,
                         "temperature": self.config.TEMPERATURE,
-                        "max_tokens": self.config.MAX_TOKENS,
+                        "max_tokens": max_tokens,
                         "top_p": self.config.TOP_P,
                         "top_k": self.config.TOP_K
                     }
@@ -503,6 +1130,8 @@ class SimpleGeminiMedicalAPI:
         except Exception as e:
             error_message = str(e)
             logger.error(f"Report enhancement failed: {error_message}")
+            processing_time = time.perf_counter() - start_time
+            now_iso = datetime.now().isoformat()
             
             return {
                 "status": "error",
@@ -510,13 +1139,31 @@ class SimpleGeminiMedicalAPI:
                 "enhanced_report": f"Rapor geliştirme sırasında bir hata oluştu: {error_message}\n\nLütfen tekrar deneyiniz veya sistem yöneticisi ile iletişime geçiniz.",
                 "metadata": {
                     "domain": request_data.get("domain", "unknown"),
-                    "provider": "gemini",
-                    "enhancement_timestamp": datetime.now().isoformat(),
+                    "provider": request_data.get("provider", LLMProvider.GEMINI.value),
+                    "enhancement_timestamp": now_iso,
                     "error_details": error_message,
-                    "processing_time_seconds": (datetime.now() - start_time).total_seconds()
+                    "processing_time_seconds": processing_time
                 }
             }
 
+    def enhance_reports(self, requests_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Enhance several medical reports concurrently from synchronous code."""
+        
+        async def _enhance_all():
+            async with GeminiReportEnhancer(self.config) as enhancer:
+                return await enhancer.enhance_medical_reports(requests_data)
+        
+        return asyncio.run(_enhance_all())
+
+    def enhance_reports_batch(self, requests_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Enhance medical reports through batch mode from synchronous code (blocks until the job ends)."""
+        
+        async def _enhance_all():
+            async with GeminiReportEnhancer(self.config) as enhancer:
+                return await enhancer.enhance_medical_reports_batch(requests_data)
+        
+        return asyncio.run(_enhance_all())
+
 def setup_environment_variables():
     """Setup environment variables guide"""
     print("🔧 Environment Variables Setup:")
@@ -529,6 +1176,7 @@ def setup_environment_variables():
     print()
     print("# Opsiyonel ayarlar:")
     print("echo 'GEMINI_MODEL=gemini-1.5-flash' >> .env")
+    print("echo 'GEMINI_MODEL_FAST=gemini-1.5-flash-8b' >> .env  # basit sorular için (opsiyonel)")
     print("echo 'GEMINI_TEMPERATURE=0.3' >> .env")
     print("echo 'GEMINI_MAX_TOKENS=2000' >> .env")
     print()
@@ -613,6 +1261,7 @@ def example_sync_api_usage():
         print(f"❌ Test failed: {str(e)}")
 
 if __name__ == "__main__":
+    setup_logging()
     print("🤖 Gemini Medical Report Enhancer")
     print("=" * 50)
     print("1. Bu servis medikal raporları Gemini AI ile geliştirir")
@@ -6,10 +6,18 @@ Proje bağımlılıklarını kontrol eder ve otomatik olarak kurar.
 
 import sys
 import os
-import subprocess
+import atexit
+import site
+import json
+import hashlib
+import socket
+import shutil
+import signal
 import time
-import webbrowser
-from pathlib import Path
+
+if sys.version_info < (3, 8):
+    sys.stderr.write(f"❌ Hata: Python 3.8+ gerekli. Mevcut: {sys.version}\n")
+    sys.exit(1)
 
 # ANSI renk kodları
 class Colors:
@@ -23,9 +31,8 @@ class Colors:
     BOLD = '\033[1m'
     END = '\033[0m'
 
-def print_banner():
-    """Projenin başlangıç banner'ını yazdırır"""
-    banner = f"""
+# Statik metinler - import sırasında bir kez biçimlendirilir
+_BANNER = f"""
 {Colors.CYAN}{Colors.BOLD}
 ╔══════════════════════════════════════════════════════════════╗
 ║                    🏥 MediRisk AI Platform                   ║
@@ -33,223 +40,629 @@ def print_banner():
 ╚══════════════════════════════════════════════════════════════╝
 {Colors.END}
 """
-    print(banner)
 
-def check_python_version():
-    """Python versiyonunu kontrol eder"""
-    print(f"{Colors.BLUE}🐍 Python versiyonu kontrol ediliyor...{Colors.END}")
+_SUCCESS_PANEL = f"""
+{Colors.GREEN}{Colors.BOLD}✅ MediRisk AI Platform başarıyla başlatıldı!{Colors.END}
+
+📊 Backend API:  http://localhost:{{port}}
+   - Health:     http://localhost:{{port}}/api/health
+   - Docs:       http://localhost:{{port}}/docs
+
+🌐 Frontend App: http://localhost:3001
+
+{Colors.YELLOW}💡 İpucu: Durdurmak için Ctrl+C tuşlayın{Colors.END}
+{Colors.MAGENTA}🎉 Platform kullanıma hazır!{Colors.END}
+"""
+
+_QUICK_COMMANDS = f"""
+{Colors.CYAN}{Colors.BOLD}⚡ Hızlı Komutlar:{Colors.END}
+
+{Colors.YELLOW}Sadece Backend:{Colors.END}
+  cd backend && python auto_start.py
+
+{Colors.YELLOW}Sadece Frontend:{Colors.END}
+  npm start
+
+{Colors.YELLOW}Hızlı Başlatma (kontrolleri atla):{Colors.END}
+  MEDIRISK_FAST_START=1 python run.py
+  python run.py --fast
+
+{Colors.YELLOW}Bağımlılık cache'ini yok say:{Colors.END}
+  python run.py --no-cache
+
+{Colors.YELLOW}Proje .venv'i ile çalıştır:{Colors.END}
+  python run.py --venv
+
+{Colors.YELLOW}Production Build:{Colors.END}
+  npm run build
+
+{Colors.YELLOW}Production (derlenmiş frontend'i backend sunar):{Colors.END}
+  python run.py --prod
+
+{Colors.YELLOW}Test:{Colors.END}
+  cd backend && python -m pytest
+  npm test
+"""
+
+# _run dönüş kodları: komut bulunamadı / zaman aşımı
+RUN_NOT_FOUND = -1
+RUN_TIMEOUT = -2
+
+def _run(cmd, *, timeout=None, capture=False):
+    """Komutu çalıştırır ve (returncode, stdout, stderr) döndürür.
+    
+    capture=False iken çıktı doğrudan üst sürecin terminaline akar.
+    Komut bulunamazsa RUN_NOT_FOUND, zaman aşımında RUN_TIMEOUT döner.
+    """
+    import subprocess
+    
+    # Mutlak yol + close_fds=False: CPython fork yerine posix_spawn kullanır
+    executable = shutil.which(cmd[0])
+    if executable is None:
+        return RUN_NOT_FOUND, "", ""
+    cmd = [executable, *cmd[1:]]
     
-    if sys.version_info < (3, 8):
-        print(f"{Colors.RED}❌ Hata: Python 3.8+ gerekli. Mevcut: {sys.version}{Colors.END}")
+    try:
+        result = subprocess.run(cmd, capture_output=capture, text=True, timeout=timeout,
+                                close_fds=False)
+    except FileNotFoundError:
+        return RUN_NOT_FOUND, "", ""
+    except subprocess.TimeoutExpired:
+        return RUN_TIMEOUT, "", ""
+    return result.returncode, result.stdout or "", result.stderr or ""
+
+# Faz boyunca biriken çıktı satırları; faz sonunda tek yazımda basılır
+_lines = []
+
+def _log(msg):
+    """Mesajı çıktı tamponuna ekler"""
+    _lines.append(msg)
+
+def _flush_log():
+    """Tampondaki satırları tek bir stdout yazımıyla basar"""
+    if _lines:
+        sys.stdout.write("\n".join(_lines) + "\n")
+        sys.stdout.flush()
+        _lines.clear()
+
+def print_banner():
+    """Projenin başlangıç banner'ını yazdırır"""
+    _log(_BANNER)
+
+def check_node_version(verbose=False):
+    """Node.js ve npm kurulumunu kontrol eder (versiyonlar sadece verbose modda okunur)"""
+    _log(f"{Colors.BLUE}🟢 Node.js kontrol ediliyor...{Colors.END}")
+    
+    node_path = shutil.which('node')
+    if node_path is None:
+        _log(f"{Colors.YELLOW}⚠️ Node.js kurulu değil veya PATH'de yok{Colors.END}")
         return False
     
-    print(f"{Colors.GREEN}✅ Python {sys.version_info.major}.{sys.version_info.minor} - Uygun{Colors.END}")
-    return True
+    npm_path = shutil.which('npm')
+    if npm_path is None:
+        _log(f"{Colors.YELLOW}⚠️ npm kurulu değil veya PATH'de yok{Colors.END}")
+        return False
+    
+    if not verbose:
+        _log(f"{Colors.GREEN}✅ Node.js bulundu: {node_path}{Colors.END}")
+        return True
+    
+    from concurrent.futures import ThreadPoolExecutor
+    
+    # İki versiyon sorgusunu paralel çalıştır
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        node_future = executor.submit(_run, [node_path, '--version'], timeout=5, capture=True)
+        npm_future = executor.submit(_run, [npm_path, '--version'], timeout=5, capture=True)
+        node_returncode, node_stdout, _ = node_future.result()
+        npm_returncode, npm_stdout, _ = npm_future.result()
+    
+    if node_returncode == 0 and npm_returncode == 0:
+        _log(f"{Colors.GREEN}✅ Node.js {node_stdout.strip()} / npm {npm_stdout.strip()} - Uygun{Colors.END}")
+        return True
+    
+    _log(f"{Colors.YELLOW}⚠️ Node.js veya npm bulunamadı veya erişilemiyor{Colors.END}")
+    return False
 
-def check_node_version():
-    """Node.js versiyonunu kontrol eder"""
-    print(f"{Colors.BLUE}🟢 Node.js versiyonu kontrol ediliyor...{Colors.END}")
+def _probe_package(package):
+    """Paketin kurulu olup olmadığını (paket, bulundu) olarak döndürür"""
+    from importlib.metadata import version, PackageNotFoundError
     
     try:
-        result = subprocess.run(['node', '--version'], capture_output=True, text=True, timeout=5)
-        if result.returncode == 0:
-            version = result.stdout.strip()
-            print(f"{Colors.GREEN}✅ Node.js {version} - Uygun{Colors.END}")
-            return True
-        else:
-            print(f"{Colors.YELLOW}⚠️ Node.js bulunamadı veya erişilemiyor{Colors.END}")
-            return False
-    except (subprocess.TimeoutExpired, FileNotFoundError):
-        print(f"{Colors.YELLOW}⚠️ Node.js kurulu değil veya PATH'de yok{Colors.END}")
-        return False
+        version(package)
+        return package, True
+    except PackageNotFoundError:
+        return package, False
 
-def check_backend_dependencies():
-    """Backend bağımlılıklarını kontrol eder"""
-    print(f"{Colors.BLUE}📦 Backend bağımlılıkları kontrol ediliyor...{Colors.END}")
+def _environment_stamp():
+    """Python ortamının damgası: yorumlayıcı, requirements.txt, sys.prefix ve site-packages mtime'ı.
+    
+    .venv yeniden oluşturulunca ya da pip install/uninstall yapılınca site-packages değişir.
+    """
+    site_dirs = [p for p in site.getsitepackages() if os.path.isdir(p)]
+    mtime = max((os.stat(p).st_mtime for p in site_dirs), default=0)
+    return f"{_requirements_stamp()}|{sys.prefix}|{mtime}"
+
+def _dep_cache_path(packages):
+    """Mevcut Python ortamına özgü bağımlılık cache dosyasının yolunu döndürür"""
+    key_source = f"{_environment_stamp()}|{','.join(packages)}"
+    key = hashlib.blake2b(key_source.encode(), digest_size=16).hexdigest()
+    return os.path.join(os.path.expanduser("~"), ".cache", "medirisk", f"deps-{key}.json")
+
+def _cached_dep_check(packages, use_cache=True):
+    """Eksik paketleri döndürür; site-packages değişmediyse önceki sonucu kullanır"""
+    cache_path = _dep_cache_path(packages)
+    if use_cache:
+        try:
+            with open(cache_path) as f:
+                return json.load(f)["missing"]
+        except (OSError, ValueError, KeyError):
+            pass
+    
+    from concurrent.futures import ThreadPoolExecutor
+    
+    # Paketleri import etmeden dağıtım metadata'sından paralel kontrol et
+    with ThreadPoolExecutor(max_workers=min(len(packages), 8)) as executor:
+        found = dict(executor.map(_probe_package, packages))
+    missing = [package for package in packages if not found[package]]
+    
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, 'w') as f:
+            json.dump({"missing": missing, "checked_at": time.time()}, f)
+    except OSError:
+        pass
     
-    backend_path = Path("backend")
-    requirements_file = backend_path / "requirements.txt"
+    return missing
+
+# install_backend_dependencies başarılı olduğunda yazılan işaret dosyası
+BACKEND_DEPS_SENTINEL = os.path.join("backend", ".deps-installed")
+BACKEND_REQUIREMENTS = os.path.join("backend", "requirements.txt")
+
+def _requirements_stamp():
+    """Yorumlayıcı ve requirements.txt değişiklik zamanından oluşan damga"""
+    try:
+        mtime_ns = os.stat(BACKEND_REQUIREMENTS).st_mtime_ns
+    except OSError:
+        mtime_ns = 0
+    return f"{sys.executable}|{mtime_ns}"
+
+def check_backend_dependencies(use_cache=True):
+    """Backend bağımlılıklarını kontrol eder"""
+    _log(f"{Colors.BLUE}📦 Backend bağımlılıkları kontrol ediliyor...{Colors.END}")
     
-    if not requirements_file.exists():
-        print(f"{Colors.YELLOW}⚠️ requirements.txt bulunamadı{Colors.END}")
+    if not os.path.exists(BACKEND_REQUIREMENTS):
+        _log(f"{Colors.YELLOW}⚠️ requirements.txt bulunamadı{Colors.END}")
         return False
     
+    # Kurulumdan sonra ortam (venv, site-packages) değişmediyse paketleri yoklama
+    if use_cache:
+        try:
+            with open(BACKEND_DEPS_SENTINEL) as f:
+                if f.read() == _environment_stamp():
+                    _log(f"{Colors.GREEN}✅ Backend bağımlılıkları mevcut{Colors.END}")
+                    return True
+        except OSError:
+            pass
+    
     # Kritik kütüphaneleri hızlıca kontrol et
     critical_packages = ['fastapi', 'uvicorn', 'pandas', 'scikit-learn', 'numpy']
-    missing_packages = []
     
-    for package in critical_packages:
-        try:
-            __import__(package.replace('-', '_'))
-        except ImportError:
-            missing_packages.append(package)
+    missing_packages = _cached_dep_check(critical_packages, use_cache=use_cache)
     
     if missing_packages:
-        print(f"{Colors.YELLOW}⚠️ Eksik paketler: {', '.join(missing_packages)}{Colors.END}")
+        _log(f"{Colors.YELLOW}⚠️ Eksik paketler: {', '.join(missing_packages)}{Colors.END}")
         return False
     
-    print(f"{Colors.GREEN}✅ Backend bağımlılıkları mevcut{Colors.END}")
+    _log(f"{Colors.GREEN}✅ Backend bağımlılıkları mevcut{Colors.END}")
     return True
 
-def check_frontend_dependencies():
+# install_frontend_dependencies sonunda package-lock.json özetinin yazıldığı damga
+PACKAGE_LOCK = "package-lock.json"
+FRONTEND_DEPS_STAMP = os.path.join("node_modules", ".stamp")
+
+def _package_lock_hash():
+    """package-lock.json içeriğinin özetini döndürür (dosya yoksa boş)"""
+    try:
+        with open(PACKAGE_LOCK, 'rb') as f:
+            return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+    except OSError:
+        return ''
+
+def check_frontend_dependencies(use_cache=True):
     """Frontend bağımlılıklarını kontrol eder"""
-    print(f"{Colors.BLUE}📦 Frontend bağımlılıkları kontrol ediliyor...{Colors.END}")
+    _log(f"{Colors.BLUE}📦 Frontend bağımlılıkları kontrol ediliyor...{Colors.END}")
+    
+    node_modules = "node_modules"
+    package_json = "package.json"
     
-    node_modules = Path("node_modules")
-    package_json = Path("package.json")
+    if not os.path.exists(package_json):
+        _log(f"{Colors.YELLOW}⚠️ package.json bulunamadı{Colors.END}")
+        return False
+    
+    if not use_cache:
+        # Damgaya güvenme - eski davranış: node_modules dolu mu?
+        if not os.path.isdir(node_modules) or not os.listdir(node_modules):
+            _log(f"{Colors.YELLOW}⚠️ node_modules klasörü boş veya mevcut değil{Colors.END}")
+            return False
+        _log(f"{Colors.GREEN}✅ Frontend bağımlılıkları mevcut{Colors.END}")
+        return True
     
-    if not package_json.exists():
-        print(f"{Colors.YELLOW}⚠️ package.json bulunamadı{Colors.END}")
+    # npm, kurulumun sonunda node_modules/.package-lock.json dosyasını yazar
+    install_stamp = os.path.join(node_modules, ".package-lock.json")
+    if not os.path.exists(install_stamp):
+        _log(f"{Colors.YELLOW}⚠️ node_modules klasörü boş veya mevcut değil{Colors.END}")
         return False
     
-    if not node_modules.exists() or not any(node_modules.iterdir()):
-        print(f"{Colors.YELLOW}⚠️ node_modules klasörü boş veya mevcut değil{Colors.END}")
+    # package.json son kurulumdan sonra değiştiyse bağımlılıklar eskimiş olabilir
+    if os.stat(package_json).st_mtime_ns > os.stat(install_stamp).st_mtime_ns:
+        _log(f"{Colors.YELLOW}⚠️ package.json son kurulumdan sonra değişmiş{Colors.END}")
         return False
     
-    print(f"{Colors.GREEN}✅ Frontend bağımlılıkları mevcut{Colors.END}")
+    # Kurulumu run.py yaptıysa package-lock.json özeti damgadakiyle aynı olmalı
+    try:
+        with open(FRONTEND_DEPS_STAMP) as f:
+            if f.read() != _package_lock_hash():
+                _log(f"{Colors.YELLOW}⚠️ package-lock.json son kurulumdan sonra değişmiş{Colors.END}")
+                return False
+    except OSError:
+        pass
+    
+    _log(f"{Colors.GREEN}✅ Frontend bağımlılıkları mevcut{Colors.END}")
     return True
 
 def install_backend_dependencies():
     """Backend bağımlılıklarını kurar"""
     print(f"{Colors.YELLOW}📥 Backend bağımlılıkları kuruluyor...{Colors.END}")
     
-    try:
-        result = subprocess.run([
-            sys.executable, '-m', 'pip', 'install', '-r', 'backend/requirements.txt'
-        ], timeout=300)  # 5 dakika timeout
-        
-        if result.returncode == 0:
-            print(f"{Colors.GREEN}✅ Backend bağımlılıkları başarıyla kuruldu{Colors.END}")
-            return True
-        else:
-            print(f"{Colors.RED}❌ Backend bağımlılıkları kurulamadı{Colors.END}")
-            return False
-    except subprocess.TimeoutExpired:
+    returncode, _, _ = _run([sys.executable, '-m', 'pip', 'install', '-r', BACKEND_REQUIREMENTS],
+                            timeout=300)  # 5 dakika timeout
+    
+    if returncode == 0:
+        # Sonraki çalıştırmalar paket kontrolünü atlayabilsin diye işaret bırak
+        try:
+            with open(BACKEND_DEPS_SENTINEL, 'w') as f:
+                f.write(_environment_stamp())
+        except OSError:
+            pass
+        print(f"{Colors.GREEN}✅ Backend bağımlılıkları başarıyla kuruldu{Colors.END}")
+        return True
+    elif returncode == RUN_TIMEOUT:
         print(f"{Colors.RED}❌ Backend kurulumu zaman aşımına uğradı{Colors.END}")
-        return False
+    else:
+        print(f"{Colors.RED}❌ Backend bağımlılıkları kurulamadı{Colors.END}")
+    return False
 
 def install_frontend_dependencies():
     """Frontend bağımlılıklarını kurar"""
     print(f"{Colors.YELLOW}📥 Frontend bağımlılıkları kuruluyor...{Colors.END}")
     
-    try:
-        result = subprocess.run(['npm', 'install'], timeout=300)  # 5 dakika timeout
-        
-        if result.returncode == 0:
-            print(f"{Colors.GREEN}✅ Frontend bağımlılıkları başarıyla kuruldu{Colors.END}")
-            return True
-        else:
-            print(f"{Colors.RED}❌ Frontend bağımlılıkları kurulamadı{Colors.END}")
-            return False
-    except subprocess.TimeoutExpired:
+    # Kilit dosyası varsa daha hızlı ve deterministik olan npm ci'yi dene;
+    # kilit package.json ile uyumsuzsa npm ci hata verir, npm install ile tekrar dene
+    returncode = None
+    if os.path.exists(PACKAGE_LOCK) and os.path.exists("package.json"):
+        returncode, _, _ = _run(['npm', 'ci', '--prefer-offline', '--no-audit', '--no-fund'],
+                                timeout=300)  # 5 dakika timeout
+        if returncode not in (0, RUN_TIMEOUT, RUN_NOT_FOUND):
+            print(f"{Colors.YELLOW}⚠️ npm ci başarısız, npm install ile tekrar deneniyor...{Colors.END}")
+    if returncode not in (0, RUN_TIMEOUT, RUN_NOT_FOUND):
+        returncode, _, _ = _run(['npm', 'install', '--no-audit', '--no-fund'], timeout=300)
+    if returncode == 0:
+        try:
+            with open(FRONTEND_DEPS_STAMP, 'w') as f:
+                f.write(_package_lock_hash())
+        except OSError:
+            pass
+        print(f"{Colors.GREEN}✅ Frontend bağımlılıkları başarıyla kuruldu{Colors.END}")
+        return True
+    elif returncode == RUN_TIMEOUT:
         print(f"{Colors.RED}❌ Frontend kurulumu zaman aşımına uğradı{Colors.END}")
+    else:
+        print(f"{Colors.RED}❌ Frontend bağımlılıkları kurulamadı{Colors.END}")
+    return False
+
+# npm run build çıktısı; production modunda backend tarafından sunulur
+BUILD_DIR = "build"
+BUILD_STAMP = os.path.join(BUILD_DIR, ".stamp")
+
+def _build_stamp():
+    """Derlemenin güncelliği için damga: package-lock.json özeti + kaynakların son mtime'ı"""
+    try:
+        latest = os.stat("package.json").st_mtime_ns
+    except OSError:
+        latest = 0
+    for root in ("src", "public"):
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                latest = max(latest, os.stat(os.path.join(dirpath, name)).st_mtime_ns)
+    return f"{_package_lock_hash()}|{latest}"
+
+def _build_is_current():
+    """Mevcut build/ klasörü kaynaklarla güncel mi?"""
+    try:
+        with open(BUILD_STAMP) as f:
+            return f.read() == _build_stamp()
+    except OSError:
+        return False
+
+def build_frontend():
+    """Frontend'i derler (npm run build) ve damgayı yazar"""
+    print(f"{Colors.YELLOW}🏗️ Frontend derleniyor (npm run build)...{Colors.END}")
+    
+    returncode, _, _ = _run(['npm', 'run', 'build'], timeout=600)  # 10 dakika timeout
+    if returncode == 0:
+        try:
+            with open(BUILD_STAMP, 'w') as f:
+                f.write(_build_stamp())
+        except OSError:
+            pass
+        print(f"{Colors.GREEN}✅ Frontend derlendi{Colors.END}")
+        return True
+    elif returncode == RUN_TIMEOUT:
+        print(f"{Colors.RED}❌ Frontend derlemesi zaman aşımına uğradı{Colors.END}")
+    else:
+        print(f"{Colors.RED}❌ Frontend derlenemedi{Colors.END}")
+    return False
+
+def start_production(build=True):
+    """Production modu: derlenmiş frontend'i backend sunar, ayrı Node süreci yok"""
+    if build and not build_frontend():
+        print(f"{Colors.YELLOW}⚠️ Mevcut build/ klasörü kullanılacak{Colors.END}")
+    
+    if not os.path.isfile(os.path.join(BUILD_DIR, "index.html")):
+        print(f"{Colors.YELLOW}⚠️ build/ bulunamadı, sadece API sunulacak (npm run build){Colors.END}")
+    
+    # backend/main.py bu değişkeni görünce build/ klasörünü "/" altına bağlar;
+    # auto_start.py de uvicorn'u --reload olmadan başlatır
+    os.environ["MEDIRISK_PROD"] = "1"
+    print(f"{Colors.MAGENTA}🚀 Production modu: uygulama ve API http://localhost:8000 adresinde{Colors.END}")
+    _run([sys.executable, 'backend/auto_start.py'])
+
+def _wait_for_port(host, port, timeout=30.0, interval=0.05):
+    """Port bağlantı kabul edene kadar kısa aralıklarla yoklar"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.settimeout(0.2)
+            if s.connect_ex((host, port)) == 0:
+                return True
+        time.sleep(interval)
+    return False
+
+# auto_start.py'nin uvicorn'u başlatmadan önce seçtiği port'u yazdığı dosya
+BACKEND_PORT_CONFIG = os.path.join("backend", "port_config.json")
+DEFAULT_BACKEND_PORT = 8000
+
+def _wait_for_backend_port(since, process, timeout=10.0, interval=0.05):
+    """auto_start.py'nin bu çalıştırmada (since'ten sonra) yazdığı port'u döndürür.
+    
+    Dosya eski bir çalıştırmadan kalmış olabilir; timestamp alanı since'ten
+    eskiyse yeni kayıt beklenir. Zamanında yazılmazsa None döner.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and process.poll() is None:
+        try:
+            with open(BACKEND_PORT_CONFIG) as f:
+                config = json.load(f)
+            if config.get("timestamp", 0) >= since:
+                return int(config["port"])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        time.sleep(interval)
+    return None
+
+def _wait_for_child_exit(*processes):
+    """Process'lerden biri sonlanana kadar bekler.
+    
+    POSIX'te SIGCHLD bloklanıp sigtimedwait ile beklenir; ana thread
+    çocuk süreç ölene kadar uykuda kalır. Desteklenmeyen platformlarda
+    saniyelik poll döngüsüne düşer.
+    """
+    if not hasattr(signal, 'sigtimedwait'):
+        while all(p.poll() is None for p in processes):
+            time.sleep(1)
+        return
+    
+    # Çocuklar başlatıldıktan sonra blokla ki sinyal maskesini miras almasınlar
+    signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGCHLD})
+    try:
+        while all(p.poll() is None for p in processes):
+            signal.sigtimedwait({signal.SIGCHLD}, 60)
+    finally:
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, {signal.SIGCHLD})
+
+def _has_display():
+    """Tarayıcı açılabilecek etkileşimli bir grafik ortamda mıyız?"""
+    if not sys.stdout.isatty():
         return False
+    if sys.platform.startswith('linux'):
+        return bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+    return True
+
+# Çıkışta süreç gruplarıyla birlikte sonlandırılacak servis süreçleri
+_backend_process = None
+_frontend_process = None
+
+# Backend (auto_start -> uvicorn reloader -> worker) düzgün kapanma süresi
+BACKEND_SHUTDOWN_GRACE = 5.0
+
+def _signal_group(process, sig=signal.SIGTERM):
+    """Kendi oturumunda başlatılmış sürecin tüm grubuna sinyal gönderir"""
+    if process is None:
+        return
+    if hasattr(os, 'killpg'):
+        # start_new_session=True olduğundan grup kimliği sürecin pid'i
+        try:
+            os.killpg(process.pid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+    elif process.poll() is None:
+        process.terminate()
+
+def _group_alive(process):
+    """Sürecin grubunda hâlâ canlı süreç var mı?"""
+    if process is None:
+        return False
+    # Çıkmış lideri biç; zombi lider grubu hep canlı gösterir
+    process.poll()
+    if hasattr(os, 'killpg'):
+        try:
+            os.killpg(process.pid, 0)
+        except (ProcessLookupError, PermissionError):
+            return False
+        return True
+    return process.returncode is None
+
+def _terminate_service_groups(sig=signal.SIGTERM):
+    """Backend ve frontend (npm -> node/webpack) süreç ağaçlarını sonlandırır"""
+    _signal_group(_backend_process, sig)
+    _signal_group(_frontend_process, sig)
+
+def _handle_termination_signal(signum, frame):
+    """SIGTERM/SIGHUP: Ctrl+C ile aynı kapanışı başlatır"""
+    raise KeyboardInterrupt
 
 def start_services():
     """Servisleri başlatır"""
+    import subprocess
+    
     print(f"{Colors.CYAN}{Colors.BOLD}🚀 Servisler otomatik olarak başlatılıyor...{Colors.END}")
     
     # Backend başlat
     print(f"{Colors.BLUE}🔧 Backend başlatılıyor...{Colors.END}")
+    # Kendi oturumunda başlat: auto_start -> uvicorn ağacı tek süreç grubu olur
+    global _backend_process, _frontend_process
     backend_cmd = [sys.executable, 'backend/auto_start.py']
-    backend_process = subprocess.Popen(backend_cmd, cwd='.', 
+    backend_started_at = time.time()
+    backend_process = subprocess.Popen(backend_cmd,
                                      stdout=subprocess.DEVNULL, 
-                                     stderr=subprocess.DEVNULL)
-    
-    # Backend'in başlaması için bekle
-    print(f"{Colors.YELLOW}⏳ Backend başlatılması bekleniyor (3 saniye)...{Colors.END}")
-    time.sleep(3)
+                                     stderr=subprocess.DEVNULL,
+                                     start_new_session=True)
+    _backend_process = backend_process
     
-    # Frontend başlat
+    # Frontend başlat - webpack derlemesi backend'e bağlı değil, beklemeden başlat
     print(f"{Colors.BLUE}🌐 Frontend başlatılıyor...{Colors.END}")
-    frontend_env = os.environ.copy()
-    frontend_env['PORT'] = '3001'
-    frontend_cmd = ['npm', 'start']
-    frontend_process = subprocess.Popen(frontend_cmd, env=frontend_env, cwd='.', 
+    frontend_env = {**os.environ, 'PORT': '3001'}
+    frontend_cmd = [shutil.which('npm') or 'npm', 'start']
+    # Kendi oturumunda başlat: npm -> node -> webpack ağacı tek süreç grubu olur
+    frontend_process = subprocess.Popen(frontend_cmd, env=frontend_env,
                                       stdout=subprocess.DEVNULL, 
-                                      stderr=subprocess.DEVNULL)
+                                      stderr=subprocess.DEVNULL,
+                                      start_new_session=True)
+    _frontend_process = frontend_process
+    atexit.register(_terminate_service_groups)
+    # Ayrı oturumdaki servisler terminal kapanınca SIGHUP almaz; atexit de SIGTERM/SIGHUP'ta çalışmaz
+    for sig_name in ('SIGTERM', 'SIGHUP'):
+        if hasattr(signal, sig_name):
+            signal.signal(getattr(signal, sig_name), _handle_termination_signal)
+    
+    # İki servis paralel açılırken port'ların dinlemeye başlamasını bekle
+    print(f"{Colors.YELLOW}⏳ Backend başlatılması bekleniyor...{Colors.END}")
+    # Backend 8000 doluysa başka port seçer; seçilen port'u port_config.json'dan oku
+    backend_port = _wait_for_backend_port(backend_started_at, backend_process)
+    if backend_port is None:
+        backend_port = DEFAULT_BACKEND_PORT
+        backend_ready = False
+    else:
+        backend_ready = _wait_for_port("127.0.0.1", backend_port)
+    if not backend_ready:
+        print(f"{Colors.YELLOW}⚠️ Backend zamanında yanıt vermedi, devam ediliyor{Colors.END}")
+    
+    print(f"{Colors.YELLOW}⏳ Frontend derleniyor...{Colors.END}")
+    frontend_ready = _wait_for_port("127.0.0.1", 3001, timeout=120.0)
+    if not frontend_ready:
+        print(f"{Colors.YELLOW}⚠️ Frontend zamanında yanıt vermedi, devam ediliyor{Colors.END}")
+    
+    # Tarayıcıyı sadece iki servis de hazırsa ve grafik ortam varsa aç
+    if backend_ready and frontend_ready and _has_display():
+        import webbrowser
+        try:
+            print(f"{Colors.CYAN}🌐 Tarayıcı açılıyor: http://localhost:3001{Colors.END}")
+            webbrowser.open('http://localhost:3001')
+        except Exception as e:
+            print(f"{Colors.YELLOW}⚠️ Tarayıcı açılamadı: {str(e)}{Colors.END}")
     
-    # Frontend'in başlaması için bekle
-    print(f"{Colors.YELLOW}⏳ Frontend derleniyor (10 saniye)...{Colors.END}")
-    time.sleep(10)
-    
-    # Tarayıcıyı aç
-    try:
-        print(f"{Colors.CYAN}🌐 Tarayıcı açılıyor: http://localhost:3001{Colors.END}")
-        webbrowser.open('http://localhost:3001')
-    except Exception as e:
-        print(f"{Colors.YELLOW}⚠️ Tarayıcı açılamadı: {str(e)}{Colors.END}")
-    
-    print(f"""
-{Colors.GREEN}{Colors.BOLD}✅ MediRisk AI Platform başarıyla başlatıldı!{Colors.END}
-
-📊 Backend API:  http://localhost:8000
-   - Health:     http://localhost:8000/
-   - Docs:       http://localhost:8000/docs
-
-🌐 Frontend App: http://localhost:3001
-
-{Colors.YELLOW}💡 İpucu: Durdurmak için Ctrl+C tuşlayın{Colors.END}
-{Colors.MAGENTA}🎉 Platform kullanıma hazır!{Colors.END}
-""")
+    print(_SUCCESS_PANEL.format(port=backend_port))
     
     try:
         # Process'leri bekle
-        while True:
-            if backend_process.poll() is not None or frontend_process.poll() is not None:
-                print(f"{Colors.RED}❌ Bir servis beklenmedik şekilde durdu{Colors.END}")
-                break
-            time.sleep(1)
+        _wait_for_child_exit(backend_process, frontend_process)
+        print(f"{Colors.RED}❌ Bir servis beklenmedik şekilde durdu{Colors.END}")
     except KeyboardInterrupt:
         print(f"\n{Colors.YELLOW}🛑 Servisler durduruluyor...{Colors.END}")
+        # auto_start SIGTERM'ü uvicorn'a iletir; frontend grubu doğrudan sonlandırılır
         backend_process.terminate()
-        frontend_process.terminate()
+        _signal_group(frontend_process)
         
-        # Process'lerin temizlenmesini bekle
-        time.sleep(2)
+        # Düzgün kapanmalarını bekle (reloader + worker birkaç saniye sürebilir),
+        # sadece kalan süreç gruplarını zorla sonlandır
+        deadline = time.monotonic() + BACKEND_SHUTDOWN_GRACE
+        while time.monotonic() < deadline and (_group_alive(backend_process) or _group_alive(frontend_process)):
+            time.sleep(0.05)
         
-        # Force kill if still running
-        try:
-            backend_process.kill()
-            frontend_process.kill()
-        except:
-            pass
+        _terminate_service_groups(getattr(signal, 'SIGKILL', signal.SIGTERM))
             
         print(f"{Colors.GREEN}✅ Tüm servisler durduruldu{Colors.END}")
 
 def show_quick_commands():
     """Hızlı komutları gösterir"""
-    commands = f"""
-{Colors.CYAN}{Colors.BOLD}⚡ Hızlı Komutlar:{Colors.END}
-
-{Colors.YELLOW}Sadece Backend:{Colors.END}
-  cd backend && python auto_start.py
-
-{Colors.YELLOW}Sadece Frontend:{Colors.END}
-  npm start
+    print(_QUICK_COMMANDS)
 
-{Colors.YELLOW}Production Build:{Colors.END}
-  npm run build
-
-{Colors.YELLOW}Test:{Colors.END}
-  cd backend && python -m pytest
-  npm test
-"""
-    print(commands)
+def _reexec_in_venv():
+    """--venv verildiyse proje .venv'inin Python'u ile yeniden başlatır (sadece POSIX).
+    
+    İsteğe bağlıdır: conda veya başka bir venv'den bilerek çalıştıran kullanıcı
+    kendiliğinden .venv'e geçirilmez.
+    """
+    if "--venv" not in sys.argv[1:]:
+        return
+    # Windows'ta os.execv süreci değiştirmez, yeni süreç başlatıp çıkar; kabuk erken döner
+    if os.name == 'nt':
+        print(f"{Colors.YELLOW}⚠️ --venv Windows'ta desteklenmiyor; .venv\\Scripts\\python.exe run.py ile çalıştırın{Colors.END}")
+        return
+    
+    venv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".venv")
+    venv_python = os.path.join(venv_path, "bin", "python")
+    if not os.path.exists(venv_python):
+        print(f"{Colors.YELLOW}⚠️ .venv bulunamadı, mevcut yorumlayıcı kullanılacak{Colors.END}")
+        return
+    if os.path.realpath(sys.prefix) == os.path.realpath(venv_path):
+        return
+    # Bozuk/sembolik bağlı venv'de sys.prefix hiç eşleşmeyebilir; yalnızca bir kez yeniden başlat
+    if os.environ.get("MEDIRISK_REEXECED") == "1":
+        return
+    
+    print(f"{Colors.BLUE}🔁 .venv yorumlayıcısı ile yeniden başlatılıyor...{Colors.END}")
+    os.environ["MEDIRISK_REEXECED"] = "1"
+    os.execv(venv_python, [venv_python, *sys.argv])
 
 def main():
     """Ana fonksiyon - Otomatik başlatma modu"""
+    _reexec_in_venv()
+    
     start_time = time.time()
     
     print_banner()
     
-    # Hızlı kontroller
-    if not check_python_version():
-        sys.exit(1)
+    prod = "--prod" in sys.argv[1:]
     
-    has_node = check_node_version()
-    has_backend_deps = check_backend_dependencies()
-    has_frontend_deps = check_frontend_dependencies() if has_node else False
+    # Hızlı başlatma: tüm kontrolleri atla
+    if os.environ.get("MEDIRISK_FAST_START") == "1" or "--fast" in sys.argv[1:]:
+        _log(f"{Colors.MAGENTA}⚡ Hızlı başlatma: kontroller atlanıyor...{Colors.END}")
+        _flush_log()
+        if prod:
+            start_production(build=False)
+        else:
+            start_services()
+        return
+    
+    # Hızlı kontroller (Python versiyonu import sırasında kontrol edildi)
+    has_node = check_node_version(verbose='--verbose' in sys.argv[1:])
+    use_cache = "--no-cache" not in sys.argv[1:]
+    has_backend_deps = check_backend_dependencies(use_cache=use_cache)
+    # Production modunda node_modules yalnızca build/ eskiyse gerekir
+    need_frontend = has_node and not (prod and _build_is_current())
+    has_frontend_deps = check_frontend_dependencies(use_cache=use_cache) if need_frontend else False
+    _flush_log()
     
     # Eksik bağımlılıkları kur
     need_install = False
@@ -261,11 +674,11 @@ def main():
             sys.exit(1)
         need_install = True
     
-    if has_node and not has_frontend_deps:
+    if need_frontend and not has_frontend_deps:
         print(f"{Colors.YELLOW}🔄 Frontend bağımlılıkları eksik, otomatik kuruluyor...{Colors.END}")
         if not install_frontend_dependencies():
             print(f"{Colors.RED}❌ Frontend kurulumu başarısız, sadece backend başlatılacak{Colors.END}")
-            has_node = False
+            has_node = need_frontend = False
     
     elapsed_time = time.time() - start_time
     
@@ -274,10 +687,15 @@ def main():
     else:
         print(f"{Colors.GREEN}✅ Tüm bağımlılıklar hazır ({elapsed_time:.1f}s){Colors.END}")
     
+    # Production: tek süreç, frontend derlenmiş haliyle backend'den sunulur
+    if prod:
+        start_production(build=need_frontend)
+        return
+    
     # Node.js yoksa sadece backend'i başlat
     if not has_node:
         print(f"{Colors.BLUE}🔧 Sadece Backend başlatılıyor (Node.js bulunamadı)...{Colors.END}")
-        subprocess.run([sys.executable, 'backend/auto_start.py'])
+        _run([sys.executable, 'backend/auto_start.py'])
         return
     
     # Otomatik olarak tüm servisleri başlat
@@ -288,8 +706,10 @@ if __name__ == "__main__":
     try:
         main()
     except KeyboardInterrupt:
+        _flush_log()
         print(f"\n{Colors.YELLOW}🛑 İşlem kullanıcı tarafından iptal edildi{Colors.END}")
         sys.exit(0)
     except Exception as e:
+        _flush_log()
         print(f"{Colors.RED}❌ Beklenmeyen hata: {str(e)}{Colors.END}")
         sys.exit(1)
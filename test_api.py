@@ -5,49 +5,52 @@ API test script for YZTA-AI-17 Health Screening App
 
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
 
-def test_api():
-    """Test API endpoints"""
-    base_url = "http://localhost:8000"
-    
-    print("🧪 YZTA-AI-17 API Test")
-    print("=" * 50)
-    
-    # Test 1: Check if server is running
+# Her kontrol (başarılı_mı, çıktı_satırları) döndürür; satırlar tüm istekler
+# bittikten sonra sabit sırayla yazdırılır
+
+def check_server(base_url):
+    """Test 1: Check if server is running"""
     try:
-        response = requests.get(f"{base_url}/")
-        print(f"✅ Server Status: {response.status_code}")
+        response = requests.get(f"{base_url}/api/health")
+        lines = [f"✅ Server Status: {response.status_code}"]
         if response.status_code == 200:
-            print(f"   Response: {response.json()}")
+            lines.append(f"   Response: {response.json()}")
+        return True, lines
     except Exception as e:
-        print(f"❌ Server connection failed: {e}")
-        return
-    
-    # Test 2: Get available tests
+        return False, [f"❌ Server connection failed: {e}"]
+
+def check_tests(base_url):
+    """Test 2: Get available tests"""
     try:
         response = requests.get(f"{base_url}/tests")
-        print(f"✅ Available Tests: {response.status_code}")
+        lines = [f"✅ Available Tests: {response.status_code}"]
         if response.status_code == 200:
             tests = response.json()
-            print(f"   Found {len(tests['tests'])} test types")
+            lines.append(f"   Found {len(tests['tests'])} test types")
             for test in tests['tests']:
-                print(f"   - {test['id']}: {test['name']}")
+                lines.append(f"   - {test['id']}: {test['name']}")
+        return True, lines
     except Exception as e:
-        print(f"❌ Tests endpoint failed: {e}")
-    
-    # Test 3: Get model info
+        return False, [f"❌ Tests endpoint failed: {e}"]
+
+def check_models(base_url):
+    """Test 3: Get model info"""
     try:
         response = requests.get(f"{base_url}/models")
-        print(f"✅ Model Info: {response.status_code}")
+        lines = [f"✅ Model Info: {response.status_code}"]
         if response.status_code == 200:
             models = response.json()
-            print(f"   Loaded {len(models['models'])} models")
+            lines.append(f"   Loaded {len(models['models'])} models")
             for model_name, info in models['models'].items():
-                print(f"   - {model_name}: {info['type']} (Accuracy: {info['accuracy']:.3f})")
+                lines.append(f"   - {model_name}: {info['type']} (Accuracy: {info['accuracy']:.3f})")
+        return True, lines
     except Exception as e:
-        print(f"❌ Models endpoint failed: {e}")
-    
-    # Test 4: Test cardiovascular prediction
+        return False, [f"❌ Models endpoint failed: {e}"]
+
+def predict_cardiovascular(base_url):
+    """Test 4: Test cardiovascular prediction"""
     try:
         test_data = {
             "test_type": "cardiovascular",
@@ -65,27 +68,29 @@ def test_api():
                 "active": 1
             }
         }
-        
+
         response = requests.post(
             f"{base_url}/predict",
             headers={"Content-Type": "application/json"},
             data=json.dumps(test_data)
         )
-        
-        print(f"✅ Cardiovascular Prediction: {response.status_code}")
+
+        lines = [f"✅ Cardiovascular Prediction: {response.status_code}"]
         if response.status_code == 200:
             result = response.json()
-            print(f"   Risk: {result['risk']}")
-            print(f"   Score: {result['score']:.3f}")
-            print(f"   Message: {result['message']}")
-            print(f"   Confidence: {result.get('confidence', 'N/A')}")
+            lines.append(f"   Risk: {result['risk']}")
+            lines.append(f"   Score: {result['score']:.3f}")
+            lines.append(f"   Message: {result['message']}")
+            lines.append(f"   Confidence: {result.get('confidence', 'N/A')}")
         else:
-            print(f"   Error: {response.text}")
-            
+            lines.append(f"   Error: {response.text}")
+        return True, lines
+
     except Exception as e:
-        print(f"❌ Cardiovascular prediction failed: {e}")
-    
-    # Test 5: Test fetal health prediction
+        return False, [f"❌ Cardiovascular prediction failed: {e}"]
+
+def predict_fetal_health(base_url):
+    """Test 5: Test fetal health prediction"""
     try:
         test_data = {
             "test_type": "fetal-health",
@@ -101,25 +106,47 @@ def test_api():
                 "histogram_tendency": 1
             }
         }
-        
+
         response = requests.post(
             f"{base_url}/predict",
             headers={"Content-Type": "application/json"},
             data=json.dumps(test_data)
         )
-        
-        print(f"✅ Fetal Health Prediction: {response.status_code}")
+
+        lines = [f"✅ Fetal Health Prediction: {response.status_code}"]
         if response.status_code == 200:
             result = response.json()
-            print(f"   Risk: {result['risk']}")
-            print(f"   Score: {result['score']:.3f}")
-            print(f"   Message: {result['message']}")
+            lines.append(f"   Risk: {result['risk']}")
+            lines.append(f"   Score: {result['score']:.3f}")
+            lines.append(f"   Message: {result['message']}")
         else:
-            print(f"   Error: {response.text}")
-            
+            lines.append(f"   Error: {response.text}")
+        return True, lines
+
     except Exception as e:
-        print(f"❌ Fetal health prediction failed: {e}")
-    
+        return False, [f"❌ Fetal health prediction failed: {e}"]
+
+CHECKS = [check_server, check_tests, check_models, predict_cardiovascular, predict_fetal_health]
+
+def test_api():
+    """Test API endpoints"""
+    base_url = "http://localhost:8000"
+
+    print("🧪 YZTA-AI-17 API Test")
+    print("=" * 50)
+
+    # Tüm istekleri aynı anda gönder; toplam süre en yavaş isteğe iner
+    with ThreadPoolExecutor(max_workers=len(CHECKS)) as executor:
+        results = list(executor.map(lambda check: check(base_url), CHECKS))
+
+    server_ok, server_lines = results[0]
+    print("\n".join(server_lines))
+    if not server_ok:
+        return
+
+    for _, lines in results[1:]:
+        print("\n".join(lines))
+
     print("\n🎉 API test completed!")
     print(f"📖 API Documentation: {base_url}/docs")
 
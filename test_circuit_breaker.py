@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+🧪 GEMINI CIRCUIT BREAKER TEST
+=============================
+
+Bu script backend'deki CircuitBreaker durum geçişlerini ve
+/api/enhance-report endpoint'inin açık devrede fallback döndürmesini test eder.
+"""
+
+import sys
+import os
+import time
+import asyncio
+from unittest import mock
+
+# Backend path'i ekle
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+import main
+from main import CircuitBreaker, ReportEnhanceRequest
+
+def test_opens_after_fail_max():
+    """fail_max ardışık hatadan sonra devre açılır"""
+    breaker = CircuitBreaker(fail_max=3, reset_timeout=60)
+    for _ in range(2):
+        breaker.record_failure()
+        assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+def test_success_resets_failures():
+    """Başarılı çağrı hata sayacını sıfırlar"""
+    breaker = CircuitBreaker(fail_max=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success(0.1)
+    breaker.record_failure()
+    assert breaker.allow()
+
+def test_slow_call_counts_as_failure():
+    """slow_call_seconds'tan uzun süren başarılı çağrı hata sayılır"""
+    breaker = CircuitBreaker(fail_max=1, reset_timeout=60, slow_call_seconds=1.0)
+    breaker.record_success(2.0)
+    assert not breaker.allow()
+
+def test_half_open_allows_single_trial_then_closes():
+    """Süre dolunca tek deneme çağrısına izin verilir; başarılıysa devre kapanır"""
+    breaker = CircuitBreaker(fail_max=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()       # yarı açık: deneme çağrısı
+    assert not breaker.allow()   # deneme sürerken diğerleri fallback alır
+
+    breaker.record_success(0.1)
+    assert breaker.allow()
+    assert breaker.allow()
+
+def test_half_open_failure_reopens():
+    """Yarı açık durumdaki deneme başarısızsa devre yeniden açılır"""
+    breaker = CircuitBreaker(fail_max=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert not breaker.allow()
+
+def _enhance_request():
+    return ReportEnhanceRequest(
+        domain="cardiovascular",
+        patient_data={"age": 55},
+        prediction_result={"score": 0.7},
+        user_prompt="Risk faktörlerimi açıklar mısınız?"
+    )
+
+def test_endpoint_returns_fallback_when_circuit_open():
+    """Devre açıkken /api/enhance-report Gemini'yi çağırmadan fallback döndürür"""
+    breaker = CircuitBreaker(fail_max=1, reset_timeout=60)
+    breaker.record_failure()
+    with mock.patch.dict(os.environ, {"GEMINI_API_KEY": "test-key"}), \
+         mock.patch.object(main, "gemini_circuit", breaker), \
+         mock.patch.object(main.http_session, "post") as post:
+        response = asyncio.run(main.enhance_report(_enhance_request()))
+
+    post.assert_not_called()
+    assert response.metadata["circuit_open"] is True
+    assert response.metadata["fallback_used"] is True
+
+def test_endpoint_stops_retrying_when_circuit_opens():
+    """Devre istek sırasında açılırsa kalan denemeler Gemini'ye gitmez"""
+    breaker = CircuitBreaker(fail_max=1, reset_timeout=60)
+    overloaded = mock.Mock(status_code=503, text="overloaded")
+    with mock.patch.dict(os.environ, {"GEMINI_API_KEY": "test-key"}), \
+         mock.patch.object(main, "gemini_circuit", breaker), \
+         mock.patch.object(main.http_session, "post", return_value=overloaded) as post, \
+         mock.patch.object(main.time, "sleep"):
+        response = asyncio.run(main.enhance_report(_enhance_request()))
+
+    assert post.call_count == 1
+    assert response.metadata["circuit_open"] is True
+    assert response.metadata["attempts_made"] == 1
+
+if __name__ == "__main__":
+    print("🧪 Circuit Breaker Test")
+    print("=" * 50)
+
+    tests = [
+        test_opens_after_fail_max,
+        test_success_resets_failures,
+        test_slow_call_counts_as_failure,
+        test_half_open_allows_single_trial_then_closes,
+        test_half_open_failure_reopens,
+        test_endpoint_returns_fallback_when_circuit_open,
+        test_endpoint_stops_retrying_when_circuit_opens,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError:
+            failed += 1
+            print(f"❌ {test.__name__}")
+
+    sys.exit(1 if failed else 0)
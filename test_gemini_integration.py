@@ -7,6 +7,7 @@ Bu script Gemini API entegrasyonunu test eder.
 """
 
 import sys
+import asyncio
 import os
 import json
 from datetime import datetime
@@ -84,18 +85,22 @@ def test_api_endpoint_structure():
     
     try:
         from main import app
-        from fastapi.testclient import TestClient
+        import httpx
         
-        client = TestClient(app)
+        # ASGI uygulamasını aynı event loop içinde çağır (TestClient'ın thread köprüsü olmadan)
+        async def get_root():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.get("/")
         
         # Test endpoint exists
-        response = client.get("/")
+        response = asyncio.run(get_root())
         print("✅ FastAPI app accessible")
         
         return True
         
-    except ImportError:
-        print("⚠️  TestClient not available, skipping endpoint test")
+    except ImportError as e:
+        print(f"⚠️  Import failed ({e}), skipping endpoint test")
         return True
     except Exception as e:
         print(f"❌ API structure test failed: {e}")